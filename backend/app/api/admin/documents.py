@@ -4,6 +4,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from app.api.admin.auth import get_current_admin
 from app.models.database import db
+from app.services.chunk_writer import chunk_writer
 
 router = APIRouter()
 
@@ -53,9 +54,7 @@ async def list_documents(
 
 @router.delete("/{document_id}")
 async def delete_document(document_id: str, admin: str = Depends(get_current_admin)):
-    # Delete chunks first (cascade usually handles this, but explicit is safe)
-    await db.execute("DELETE FROM document_chunks WHERE document_id = $1", document_id)
-    await db.execute("DELETE FROM documents WHERE id = $1", document_id)
+    await chunk_writer.delete_document(document_id)
     return {"message": "Document deleted"}
 
 @router.get("/{document_id}/content")
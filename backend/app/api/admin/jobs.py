@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.admin.auth import get_current_admin
+from app.services.contract_jobs import STAGES as CONTRACT_STAGES
+from app.services.job_queue import job_queue, STAGES
+
+router = APIRouter()
+
+def _with_progress(job: dict) -> dict:
+    # Fraction of stages completed, for progress bars
+    stages = CONTRACT_STAGES if job["job_type"] == "contract_analysis" else STAGES
+    stage = job.get("stage")
+    done = stages.index(stage) + 1 if stage in stages else 0
+    progress = job.get("progress") or {}
+    if stage == "parsing" and progress.get("page_count"):
+        # Pages are parsed and chunked together: spread them over both stages
+        done = 2 * min(progress.get("pages", 0) / progress["page_count"], 1)
+    job["progress_percent"] = 100 if job["status"] == "succeeded" else round(100 * done / len(stages))
+    # Upload paths are internal; expose only what the UI needs
+    payload = job.pop("payload", None) or {}
+    job["title"] = payload.get("title") or payload.get("query") or payload.get("filename")
+    return job
+
+@router.get("/")
+async def list_jobs(limit: int = 20, status: str = None, admin: str = Depends(get_current_admin)):
+    """
+    Recent ingestion jobs, newest first. Poll this for progress.
+    """
+    jobs = await job_queue.list_jobs(limit=limit, status=status)
+    return [_with_progress(job) for job in jobs]
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, admin: str = Depends(get_current_admin)):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _with_progress(job)
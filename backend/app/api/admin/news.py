@@ -1,19 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
-from app.services.news_scraper import NewsScraperService
 from app.api.admin.auth import get_current_admin
 from app.models.database import db
+from app.services.job_queue import job_queue
 
 router = APIRouter()
-scraper_service = NewsScraperService()
 
 @router.post("/scrape")
 async def trigger_scrape(query: str = "Kenya labor rights strikes unions news", limit: int = 5, admin: dict = Depends(get_current_admin)):
     """
-    Triggers a news scrape job (protected by admin auth).
+    Queues a news scrape job (protected by admin auth).
+    Progress is available from /api/admin/jobs/{job_id}.
     """
     try:
-        result = await scraper_service.scrape_and_index_news(query, limit)
-        return result
+        job_id = await job_queue.enqueue("news", {"query": query, "limit": limit})
+        return {"status": "queued", "job_id": job_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Form, BackgroundTasks
 from app.models.schemas import ChatRequest, ChatResponse
 from app.services.agent_service import AgentService
+from app.services.contract_jobs import contract_job_service
 from app.services.document_parser import DocumentParser
 from app.utils.limiter import limiter
+from fastapi.responses import StreamingResponse
+import json
 import uuid
 
 router = APIRouter()
@@ -11,7 +14,7 @@ document_parser = DocumentParser()
 
 @router.post("/", response_model=ChatResponse)
 @limiter.limit("20/minute")
-async def chat(request: Request, request_body: ChatRequest):
+async def chat(request: Request, request_body: ChatRequest, background_tasks: BackgroundTasks):
     session_id = request_body.session_id or str(uuid.uuid4())
     
     # Delegate to Agent Service
@@ -19,13 +22,43 @@ async def chat(request: Request, request_body: ChatRequest):
         message=request_body.message, 
         category=request_body.category,
         session_id=session_id,
-        use_web_search=request_body.use_web_search
+        use_web_search=request_body.use_web_search,
+        retrieval_mode=request_body.retrieval_mode,
+        background_tasks=background_tasks
     )
     
     return ChatResponse(
         response=result["response"],
         session_id=session_id,
-        sources=result["sources"]
+        sources=result["sources"],
+        debug=result["debug"] if request_body.debug else None
+    )
+
+@router.post("/stream")
+@limiter.limit("20/minute")
+async def chat_stream(request: Request, request_body: ChatRequest):
+    """
+    Server-Sent Events variant of the chat endpoint.
+    Emits `sources`, then `token` events as they arrive, then `done`.
+    """
+    session_id = request_body.session_id or str(uuid.uuid4())
+
+    events = agent_service.stream_chat(
+        message=request_body.message,
+        category=request_body.category,
+        session_id=session_id,
+        use_web_search=request_body.use_web_search,
+        retrieval_mode=request_body.retrieval_mode
+    )
+
+    async def event_source():
+        async for event in events:
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.post("/analyze")
@@ -47,6 +80,47 @@ async def analyze_contract(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/analyze/jobs")
+async def submit_contract_analysis(
+    file: UploadFile = File(...),
+    session_id: str = Form(None)
+):
+    """
+    Queues the analysis and returns at once. Follow it with
+    GET /analyze/jobs/{job_id} (poll) or /analyze/jobs/{job_id}/events (SSE).
+    """
+    if not file.filename.endswith(('.pdf', '.docx', '.txt')):
+         raise HTTPException(status_code=400, detail="Invalid file type")
+
+    job_id = await contract_job_service.submit(file, session_id)
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/analyze/jobs/{job_id}")
+async def get_contract_analysis(job_id: str):
+    job = await contract_job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/analyze/jobs/{job_id}/events")
+async def contract_analysis_events(job_id: str):
+    """
+    Server-Sent Events: `status` on every status/stage change, `analysis`
+    with the sections ready so far, then `done` with the full result or `error`.
+    """
+    if not await contract_job_service.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_source():
+        async for event in contract_job_service.events(job_id):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/sessions")
 async def get_sessions():
     """List recent chat sessions."""
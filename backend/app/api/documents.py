@@ -1,10 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
-from app.models.database import get_database_pool
-from app.services.document_parser import document_parser
-from app.services.embedding_service import embedding_service
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from app.config import settings
+from app.services.document_parser import SUPPORTED_EXTENSIONS, document_parser
+from app.services.job_queue import job_queue
+from app.models.database import db
 from app.models.schemas import DocumentMetadata
+import os
 import uuid
-import json
 
 router = APIRouter()
 
@@ -14,45 +15,36 @@ async def upload_document(
     title: str = Form(...),
     document_type: str = Form("general"),
     source_url: str = Form(None),
-    background_tasks: BackgroundTasks = None
+    document_key: str = Form(None)
 ):
-    # 1. Parse text
-    try:
-        text = await document_parser.parse_file(file)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    
-    # 2. Save document record
-    doc_id = uuid.uuid4()
-    pool = await get_database_pool()
-    
-    async with pool.acquire() as conn:
-        await conn.execute("""
-            INSERT INTO documents (id, title, content, document_type, source_url, metadata)
-            VALUES ($1, $2, $3, $4, $5, $6)
-        """, doc_id, title, text, document_type, source_url, json.dumps({}))
+    """
+    Queues a document for ingestion. Uploads with a document_key (or, failing
+    that, a source_url) that is already stored update that document in place:
+    only chunks whose text changed are re-embedded and rewritten.
+    """
+    file_ext = file.filename.split('.')[-1].lower()
+    if file_ext not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_ext}")
 
-    # 3. Process embeddings in background
-    if background_tasks:
-        background_tasks.add_task(process_document_embeddings, doc_id, text)
-    else:
-        # If no background task support (e.g. testing), run await
-        await process_document_embeddings(doc_id, text)
-        
-    return {"id": str(doc_id), "status": "processing"}
+    # 1. Store the upload where the ingestion workers can read it
+    document_key = document_key or source_url
+    existing_id = None
+    if document_key:
+        existing_id = await db.fetch_val("SELECT id FROM documents WHERE document_key = $1", document_key)
+    doc_id = existing_id or uuid.uuid4()
+    # Named per upload: two versions of one document may be queued at once
+    path = await document_parser.spool_upload(file, os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}.{file_ext}"))
 
-async def process_document_embeddings(doc_id: uuid.UUID, text: str):
-    chunks = document_parser.chunk_text(text)
-    pool = await get_database_pool()
-    
-    # Generate embeddings
-    embeddings = await embedding_service.batch_embed(chunks)
-    
-    # Save chunks
-    async with pool.acquire() as conn:
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            embedding_json = json.dumps(embedding)
-            await conn.execute("""
-                INSERT INTO document_chunks (id, document_id, chunk_text, chunk_index, embedding)
-                VALUES ($1, $2, $3, $4, $5::vector)
-            """, uuid.uuid4(), doc_id, chunk, i, embedding_json)
+    # 2. Queue parsing, chunking, embedding and indexing for the worker.
+    # The document row is written with its chunks, so it never appears half-indexed.
+    job_id = await job_queue.enqueue("document", {
+        "document_id": str(doc_id),
+        "path": path,
+        "filename": file.filename,
+        "title": title,
+        "document_type": document_type,
+        "source_url": source_url,
+        "document_key": document_key
+    })
+
+    return {"id": str(doc_id), "job_id": job_id, "status": "queued", "updates_existing": existing_id is not None}
@@ -1,7 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "know-your-rights"
@@ -24,6 +24,184 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     TAVILY_API_KEY: Optional[str] = None
     SERPER_API_KEY: Optional[str] = None
+
+    # Web search: every provider with a key (Tavily, Serper) is queried at once.
+    # "first" returns the first non-empty response, "merge" waits for all and
+    # dedupes by URL. Base URLs can point at a local stub.
+    WEB_SEARCH_STRATEGY: str = "first"
+    WEB_SEARCH_TIMEOUT_SECONDS: float = 8.0
+    WEB_SEARCH_MAX_CONNECTIONS: int = 20
+    WEB_SEARCH_CACHE_TTL_SECONDS: int = 600
+    WEB_SEARCH_CACHE_MAX_ENTRIES: int = 500
+    TAVILY_BASE_URL: str = "https://api.tavily.com"
+    TAVILY_SEARCH_DEPTH: str = "advanced"
+    SERPER_BASE_URL: str = "https://google.serper.dev"
+
+    # Model routing (app/services/model_router.py). LLM_BASE_URL points every
+    # stage, and embeddings, at an OpenAI-compatible endpoint such as a local
+    # stub. Models, max_tokens (None = model default) and timeouts per stage.
+    LLM_BASE_URL: Optional[str] = None
+    CHAT_MODEL: str = "gpt-4o"
+    CHAT_MAX_TOKENS: Optional[int] = None
+    CHAT_TIMEOUT_SECONDS: float = 60.0
+    CONTRACT_ANALYSIS_MODEL: str = "gpt-4o"
+    CONTRACT_ANALYSIS_MAX_TOKENS: Optional[int] = None
+    CONTRACT_ANALYSIS_TIMEOUT_SECONDS: float = 120.0
+
+    # LLM gateway (app/services/llm_gateway.py): one pooled client for all
+    # OpenAI calls. At most LLM_MAX_CONCURRENCY requests in flight, of which
+    # LLM_BATCH_MAX_CONCURRENCY batch ones; a tokens-per-minute budget (None
+    # = unlimited) whose last INTERACTIVE_TPM_RESERVE share only interactive
+    # calls may use. Interactive calls are hedged after LLM_HEDGE_AFTER_SECONDS
+    # (None = off). All limits are per process.
+    LLM_MAX_CONNECTIONS: int = 50
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_BATCH_MAX_CONCURRENCY: int = 8
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_MAX_RETRIES: int = 5
+    LLM_INTERACTIVE_MAX_RETRIES: int = 2
+    LLM_TOKENS_PER_MINUTE: Optional[int] = 800000
+    LLM_INTERACTIVE_TPM_RESERVE: float = 0.2
+    LLM_DEFAULT_COMPLETION_TOKENS: int = 500
+    LLM_HEDGE_AFTER_SECONDS: Optional[float] = None
+
+    # Contracts over CONTRACT_SINGLE_PASS_MAX_TOKENS are split into clause-aligned
+    # segments of about CONTRACT_SEGMENT_TOKENS, analyzed concurrently (at most
+    # CONTRACT_ANALYSIS_CONCURRENCY at once) and merged
+    CONTRACT_SINGLE_PASS_MAX_TOKENS: int = 6000
+    CONTRACT_SEGMENT_TOKENS: int = 1500
+    CONTRACT_ANALYSIS_CONCURRENCY: int = 8
+
+    # Contract analysis cache: exact matches on the normalized text only
+    # (analyses quote personal data, so near-duplicates are never reused);
+    # entries are purged after CONTRACT_CACHE_TTL_DAYS
+    CONTRACT_CACHE_ENABLED: bool = True
+    CONTRACT_CACHE_TTL_DAYS: int = 30
+
+    # Opt-in: when enabled, short single questions in CHAT_SIMPLE_CATEGORIES,
+    # without web results and with a retrieval match of at least
+    # MIN_RETRIEVAL_SCORE, are answered by CHAT_SIMPLE_MODEL (escalated to
+    # CHAT_MODEL if that fails or is cut off). Off by default, so every answer
+    # comes from CHAT_MODEL until the cheaper model's answers have been reviewed
+    CHAT_SIMPLE_ENABLED: bool = False
+    CHAT_SIMPLE_MODEL: str = "gpt-4o-mini"
+    CHAT_SIMPLE_TIMEOUT_SECONDS: float = 30.0
+    CHAT_SIMPLE_CATEGORIES: List[str] = ["general"]
+    CHAT_SIMPLE_MAX_QUESTION_TOKENS: int = 40
+    CHAT_SIMPLE_MIN_RETRIEVAL_SCORE: float = 0.6
+
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_VERSION_CHECK_SECONDS: float = 5.0
+
+    # Embedding cache
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 5000
+    EMBEDDING_CACHE_PERSISTENT: bool = True
+
+    # Embedding batching (the API allows 2048 inputs / 300k tokens per request)
+    EMBEDDING_BATCH_MAX_ITEMS: int = 256
+    EMBEDDING_BATCH_MAX_TOKENS: int = 60000
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_TIMEOUT_SECONDS: float = 30.0
+
+    # Document parsing (process pool; PDFs are extracted in page ranges)
+    PARSER_PROCESSES: int = 2
+    PARSER_PAGES_PER_TASK: int = 8
+
+    # Chunking (tokens, counted with the embedding model's tokenizer)
+    CHUNK_TARGET_TOKENS: int = 350
+    CHUNK_MAX_TOKENS: int = 512
+    CHUNK_MIN_TOKENS: int = 80
+    CHUNK_OVERLAP_TOKENS: int = 40
+
+    # Ingestion job queue
+    UPLOAD_DIR: str = "/tmp/know-your-rights/uploads"
+    WORKER_CONCURRENCY: int = 2
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600
+    # Contract analysis jobs run ahead of ingestion; the events stream polls
+    # the job row this often, and gives up once it hasn't changed for IDLE_SECONDS
+    CONTRACT_JOB_PRIORITY: int = 10
+    CONTRACT_JOB_EVENTS_POLL_SECONDS: float = 0.5
+    CONTRACT_JOB_EVENTS_IDLE_SECONDS: float = 300.0
+
+    # News scraping
+    NEWS_SCRAPE_CONCURRENCY: int = 8
+    NEWS_PER_DOMAIN_CONCURRENCY: int = 2
+    NEWS_PER_DOMAIN_DELAY_SECONDS: float = 0.5
+
+    # Retrieval: "vector" or "hybrid" (vector + full-text, fused with RRF)
+    RETRIEVAL_MODE: str = "vector"
+    RETRIEVAL_HYBRID_CANDIDATE_MULTIPLIER: int = 4
+    RETRIEVAL_RRF_K: int = 60
+
+    # Chat category -> document types its retrieval is restricted to.
+    # Categories not listed (e.g. general) search the whole corpus. Each
+    # filter has a matching partial HNSW index in database/init.sql.
+    RETRIEVAL_CATEGORY_DOCUMENT_TYPES: Dict[str, List[str]] = {
+        "union": ["CBA", "Law"],
+        "contract": ["Contract", "Law"],
+        "news": ["News"],
+    }
+    RETRIEVAL_HNSW_EF_SEARCH: int = 40
+    RETRIEVAL_HNSW_EF_SEARCH_FILTERED: int = 100
+    # pgvector >= 0.8: keep scanning the index until top_k rows pass the filter
+    RETRIEVAL_HNSW_ITERATIVE_SCAN: Optional[str] = "relaxed_order"
+
+    # Reranking: over-fetch candidates, re-score them ("lexical", "cross-encoder"
+    # or "none"), then keep the chunks that score close to the best one and
+    # fit the context token budget
+    RERANKER: str = "lexical"
+    RERANK_CANDIDATE_MULTIPLIER: int = 4
+    RERANK_MIN_SCORE: float = 0.3
+    RERANK_RELATIVE_CUTOFF: float = 0.6
+    RERANK_CROSS_ENCODER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RETRIEVAL_MIN_CHUNKS: int = 1
+    RETRIEVAL_CONTEXT_TOKEN_BUDGET: int = 2000
+
+    # Prompt assembly: input token budget for a chat completion, split between
+    # retrieved chunks, web results and history (unused shares are passed on)
+    PROMPT_MAX_INPUT_TOKENS: int = 6000
+    PROMPT_CONTEXT_SHARE: float = 0.55
+    PROMPT_WEB_SHARE: float = 0.2
+    PROMPT_HISTORY_SHARE: float = 0.25
+    PROMPT_HISTORY_MESSAGE_MAX_TOKENS: int = 600
+    PROMPT_CHUNK_DEDUPE_SIMILARITY: float = 0.8
+
+    # Session memory: the last SESSION_RECENT_MESSAGES stay verbatim; older
+    # turns are folded into a running summary (at least MIN_MESSAGES at a time)
+    SESSION_RECENT_MESSAGES: int = 6
+    SESSION_SUMMARY_MIN_MESSAGES: int = 4
+    SESSION_SUMMARY_MAX_TOKENS: int = 400
+    SESSION_SUMMARY_MODEL: str = "gpt-4o-mini"
+    SESSION_SUMMARY_TIMEOUT_SECONDS: float = 30.0
+
+    # Web search decision: local score >= UPPER searches, <= LOWER doesn't,
+    # the band in between asks SEARCH_DECISION_MODEL. A SHADOW_RATE sample is
+    # also decided by the reference model and logged for comparison.
+    SEARCH_DECISION_LOWER: float = 0.35
+    SEARCH_DECISION_UPPER: float = 0.65
+    SEARCH_DECISION_EXEMPLAR_WEIGHT: float = 2.0
+    SEARCH_DECISION_RAG_STRONG: float = 0.55
+    SEARCH_DECISION_RAG_WEAK: float = 0.35
+    SEARCH_DECISION_CONTEXT_TOKENS: int = 800
+    SEARCH_DECISION_MODEL: str = "gpt-4o-mini"
+    SEARCH_DECISION_MAX_TOKENS: int = 64
+    SEARCH_DECISION_TIMEOUT_SECONDS: float = 10.0
+    SEARCH_DECISION_LOG: bool = True
+    SEARCH_DECISION_SHADOW_RATE: float = 0.0
+    SEARCH_DECISION_SHADOW_MODEL: str = "gpt-4o"
+
+    # In-process NumPy copy of the chunk embeddings serving "vector" retrieval
+    # (exact search, ~6 KB of RAM per chunk); pgvector stays the fallback
+    VECTOR_INDEX_ENABLED: bool = False
+    VECTOR_INDEX_REFRESH_SECONDS: float = 5.0
     
     class Config:
         env_file = ".env"
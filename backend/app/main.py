@@ -1,19 +1,40 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import chat, documents
-from app.api.admin import auth as admin_auth, documents as admin_documents, analytics as admin_analytics, news as admin_news
+from app.api.admin import auth as admin_auth, documents as admin_documents, analytics as admin_analytics, news as admin_news, jobs as admin_jobs
 from app.config import settings
 
 from contextlib import asynccontextmanager
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from app.models.database import db
+from app.services.document_parser import shutdown_parser_pool
+from app.services.llm_gateway import llm_gateway
+from app.services.vector_index import vector_index
+from app.services.web_search_service import close_http_client
 from app.utils.limiter import limiter
+import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await db.connect()
+
+    refresh_task = None
+    if settings.VECTOR_INDEX_ENABLED:
+        try:
+            await vector_index.refresh(force=True)
+        except Exception as e:
+            # Retrieval falls back to pgvector until a refresh succeeds
+            print(f"Vector index load failed: {e}")
+        refresh_task = asyncio.create_task(vector_index.run_refresh_loop())
+
     yield
+
+    if refresh_task:
+        refresh_task.cancel()
+    shutdown_parser_pool()
+    await close_http_client()
+    await llm_gateway.close()
     await db.disconnect()
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
@@ -38,6 +59,7 @@ app.include_router(admin_auth.router, prefix="/api/admin/auth", tags=["admin-aut
 app.include_router(admin_documents.router, prefix="/api/admin/documents", tags=["admin-documents"])
 app.include_router(admin_analytics.router, prefix="/api/admin/analytics", tags=["admin-analytics"])
 app.include_router(admin_news.router, prefix="/api/admin/news", tags=["admin-news"])
+app.include_router(admin_jobs.router, prefix="/api/admin/jobs", tags=["admin-jobs"])
 
 @app.get("/health")
 async def health_check():
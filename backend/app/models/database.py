@@ -1,5 +1,6 @@
 import asyncpg
 from app.config import settings
+from pgvector.asyncpg import register_vector
 from typing import Optional
 
 class Database:
@@ -11,10 +12,16 @@ class Database:
             self.pool = await asyncpg.create_pool(
                 dsn=settings.DATABASE_URL,
                 min_size=1,
-                max_size=10
+                max_size=10,
+                init=self._init_connection
             )
             print("Database connected")
 
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection):
+        # Binary pgvector codec: vectors are exchanged as numpy float32 arrays
+        await register_vector(conn)
+
     async def disconnect(self):
         if self.pool:
             await self.pool.close()
@@ -30,6 +37,11 @@ class Database:
             await self.connect()
         return await self.pool.fetch(query, *args)
 
+    async def fetch_row(self, query, *args):
+        if not self.pool:
+            await self.connect()
+        return await self.pool.fetchrow(query, *args)
+
     async def fetch_val(self, query, *args):
         if not self.pool:
             await self.connect()
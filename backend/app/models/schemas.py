@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 class ChatSessionCreate(BaseModel):
@@ -25,8 +25,11 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = None
     category: str = "general"
     use_web_search: bool = False
+    retrieval_mode: Optional[Literal["vector", "hybrid"]] = None
+    debug: bool = False
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
     sources: List[Dict[str, Any]] = []
+    debug: Optional[Dict[str, Any]] = None
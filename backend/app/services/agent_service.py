@@ -1,119 +1,313 @@
 from app.services.rag_service import RAGService
-from app.services.embedding_service import EmbeddingService
 from app.services.contract_analyzer import ContractAnalyzer
-from app.services.web_search_service import WebSearchService
-from app.utils.prompt_templates import LABOR_RIGHTS_SYSTEM_PROMPT, UNION_QUERY_SYSTEM_PROMPT, SEARCH_DECISION_PROMPT
+from app.services.web_search_service import web_search_service
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.model_router import model_router
+from app.services.prompt_builder import prompt_builder
+from app.services.search_decider import search_decider
+from app.services.session_memory import session_memory
+from app.utils.prompt_templates import LABOR_RIGHTS_SYSTEM_PROMPT, UNION_QUERY_SYSTEM_PROMPT
 from app.config import settings
 from app.models.database import db
-from openai import AsyncOpenAI
+from fastapi import BackgroundTasks
+import asyncio
+import time
 import uuid
 
 class AgentService:
     def __init__(self):
-        self.embedding_service = EmbeddingService()
         self.rag_service = RAGService()
         self.contract_analyzer = ContractAnalyzer()
-        self.web_search = WebSearchService()
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.web_search = web_search_service
+        self.answer_cache = SemanticAnswerCache() if settings.ANSWER_CACHE_ENABLED else None
+        self._background_tasks = set()
 
-    async def handle_chat(self, message: str, category: str = "general", session_id: str = None, use_web_search: bool = False) -> dict:
+    async def handle_chat(self, message: str, category: str = "general", session_id: str = None, use_web_search: bool = False, retrieval_mode: str = None, background_tasks: BackgroundTasks = None) -> dict:
         """
         Handles a chat message based on category, with history.
+
+        Independent stages run concurrently: the session upsert, history fetch,
+        RAG retrieval and the search decision (followed by the web search) all
+        start together. Persistence is deferred to background_tasks when given,
+        so it happens after the response has been returned.
         """
         if not session_id:
             session_id = str(uuid.uuid4())
-        
-        # Ensure session exists (even if passed from client)
-        query = "INSERT INTO chat_sessions (id, title) VALUES ($1, $2) ON CONFLICT (id) DO NOTHING"
-        await db.execute(query, session_id, message[:50])
-
-        # 1. Retrieve RAG Context
-        # query_embedding is handled inside retrieve_relevant_chunks
-        chunks = await self.rag_service.retrieve_relevant_chunks(message, top_k=5)
-        
-        sources = [{"title": chunk['title'], "type": "Document"} for chunk in chunks]
-        context_text = "\n\n".join([chunk['chunk_text'] for chunk in chunks])
-
-        # 2. Perform Web Search logic
-        
-        web_results = []
-        search_query = None
 
-        if use_web_search:
-             # Force search logic
-             print(f"Forced Web Search for: {message}")
-             search_query = message
-             if "kenya" not in message.lower():
-                 search_query += " in Kenya"
+        timings = {}
+        started = time.perf_counter()
+
+        context = await self._prepare_chat(message, category, session_id, use_web_search, retrieval_mode, timings)
+
+        route = context["route"]
+        if context["cached"]:
+            answer = context["cached"]["response"]
         else:
-             # Agentic check
-             search_decision = await self._decide_search_need(message, context_text)
-             if search_decision:
-                 print(f"Agent decided to search with query: {search_decision}")
-                 search_query = search_decision
-
-        if search_query:
-             web_results = await self.web_search.search(search_query, max_results=3)
-             if web_results:
-                 web_context = "\n".join([f"Source: {r['title']}\nContent: {r['content']}" for r in web_results])
-                 context_text += f"\n\n--- WEB SEARCH RESULTS ---\n{web_context}"
-                 sources.extend([{"title": r['title'], "type": "Web", "url": r.get('url')} for r in web_results])
-
-        # 3. Retrieve History
-        history = await self._get_chat_history(session_id)
-        
-        # 4. Select System Prompt
-        if category == "union":
-            system_prompt = UNION_QUERY_SYSTEM_PROMPT.format(context=context_text, question=message)
+            # Generate Response
+            answer, route = await self._timed(timings, "generation", self._generate(route, context["messages"]))
+            self._remember_answer(context, message, category, answer)
+
+        # Persist Interaction (after the response is sent, if possible)
+        if background_tasks:
+            background_tasks.add_task(self._persist_interaction, session_id, message, answer, category)
         else:
-            system_prompt = LABOR_RIGHTS_SYSTEM_PROMPT.format(context=context_text, question=message)
-
-        # 5. Generate Response
-        messages = [{"role": "system", "content": system_prompt}] + history + [{"role": "user", "content": message}]
-        
-        response = await self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            temperature=0.3
-        )
-        
-        answer = response.choices[0].message.content
-        
-        # 6. Persist Interaction
-        await self._save_message(session_id, "user", message, metadata={"category": category})
-        await self._save_message(session_id, "assistant", answer)
-        
+            await self._persist_interaction(session_id, message, answer, category)
+
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+
         return {
             "response": answer,
+            "sources": context["sources"],
+            "session_id": session_id,
+            "debug": {"timings_ms": timings, "cache": context["cache_status"], "tokens": context["tokens"], "model": self._route_debug(route)}
+        }
+
+    async def stream_chat(self, message: str, category: str = "general", session_id: str = None, use_web_search: bool = False, retrieval_mode: str = None):
+        """
+        Streaming variant of handle_chat. Yields events as dicts:
+        "sources" first, then one "token" per delta, then "done".
+
+        The user message is saved before generation starts and the assistant
+        message when the stream completes. If the client disconnects mid-stream
+        whatever was generated so far is saved, flagged as partial.
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+
+        timings = {}
+        started = time.perf_counter()
+
+        context = await self._prepare_chat(message, category, session_id, use_web_search, retrieval_mode, timings)
+        yield {"event": "sources", "data": {"session_id": session_id, "sources": context["sources"]}}
+
+        await self._save_message(session_id, "user", message, metadata={"category": category})
+
+        route = context["route"]
+        if context["cached"]:
+            answer = context["cached"]["response"]
+            yield {"event": "token", "data": {"content": answer}}
+            self._spawn(self._save_assistant_turn(session_id, answer))
+        else:
+            parts = []
+            completed = False
+            try:
+                while True:
+                    try:
+                        stream = await model_router.complete(route, context["messages"], stream=True)
+                        async for chunk in stream:
+                            if not chunk.choices:
+                                continue
+                            delta = chunk.choices[0].delta.content
+                            if not delta:
+                                continue
+                            if not parts:
+                                timings["first_token"] = round((time.perf_counter() - started) * 1000, 1)
+                            parts.append(delta)
+                            yield {"event": "token", "data": {"content": delta}}
+                        completed = True
+                        break
+                    except Exception as e:
+                        # Nothing sent yet: a cheap route can still be escalated
+                        escalated = None if parts else model_router.escalate(route, e.__class__.__name__)
+                        if not escalated:
+                            raise
+                        route = escalated
+            except Exception as e:
+                print(f"Chat stream failed: {e}")
+                yield {"event": "error", "data": {"detail": str(e)}}
+            finally:
+                answer = "".join(parts)
+                if answer:
+                    metadata = None if completed else {"partial": True}
+                    # A detached task, so a cancelled (disconnected) stream still saves
+                    self._spawn(self._save_assistant_turn(session_id, answer, metadata))
+
+            if completed:
+                self._remember_answer(context, message, category, answer)
+
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        debug = {"timings_ms": timings, "cache": context["cache_status"], "tokens": context["tokens"], "model": self._route_debug(route)}
+        yield {"event": "done", "data": {"session_id": session_id, "debug": debug}}
+
+    async def _prepare_chat(self, message: str, category: str, session_id: str, use_web_search: bool, retrieval_mode: str, timings: dict) -> dict:
+        """
+        Gathers context and history and builds the completion messages.
+
+        The query embedding is computed first so the semantic answer cache can
+        be consulted; on a hit "cached" holds the previous answer instead of
+        "messages". Otherwise retrieval and the web search branch run
+        together, the search decision reading retrieval scores when it needs them.
+        """
+        # Fan out: session upsert and history alongside the query embedding
+        session_task = asyncio.create_task(self._timed(timings, "session_upsert", self._ensure_session(session_id, message[:50])))
+        history_task = asyncio.create_task(self._timed(timings, "history", session_memory.load(session_id)))
+        tasks = [session_task, history_task]
+
+        try:
+            query_embedding = await self._timed(timings, "embedding", self.rag_service.embed_query(message))
+            memory = await history_task
+            history = memory["messages"]
+
+            # Answers only depend on the question when there is no prior
+            # conversation and no forced search, so only those are cached
+            cacheable = self.answer_cache is not None and not use_web_search and not history and not memory["summary"]
+            cache_status = "miss" if cacheable else "bypass"
+
+            if cacheable:
+                cached = await self._timed(timings, "cache_lookup", self.answer_cache.lookup(query_embedding, category))
+                if cached:
+                    await session_task
+                    return {
+                        "messages": None,
+                        "sources": cached["sources"],
+                        "cached": cached,
+                        "cacheable": False,
+                        "cache_status": "hit",
+                        "query_embedding": query_embedding,
+                        "tokens": None,
+                        "route": None
+                    }
+
+            retrieval_task = asyncio.create_task(self._timed(timings, "retrieval", self.rag_service.retrieve_relevant_chunks(message, category=category, top_k=5, query_embedding=query_embedding, mode=retrieval_mode)))
+            web_task = asyncio.create_task(self._web_search_branch(message, use_web_search, query_embedding, retrieval_task, timings))
+            tasks += [retrieval_task, web_task]
+
+            chunks, web_results, _ = await asyncio.gather(retrieval_task, web_task, session_task)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # Select System Prompt
+        template = UNION_QUERY_SYSTEM_PROMPT if category == "union" else LABOR_RIGHTS_SYSTEM_PROMPT
+
+        # Fit chunks, web results and history into the token budget
+        prompt = prompt_builder.build(template, message, chunks, web_results, history, summary=memory["summary"])
+        messages = prompt["messages"]
+
+        sources = [{"title": chunk['title'], "type": "Document"} for chunk in prompt["chunks"]]
+        sources.extend([{"title": r['title'], "type": "Web", "url": r.get('url')} for r in prompt["web_results"]])
+
+        return {
+            "messages": messages,
             "sources": sources,
-            "session_id": session_id
+            "cached": None,
+            "cacheable": cacheable,
+            "cache_status": cache_status,
+            "query_embedding": query_embedding,
+            "tokens": prompt["tokens"],
+            # Model for the answer, from the question and the context it will see
+            "route": model_router.route_chat(message, category, prompt["chunks"], prompt["web_results"])
         }
 
-    async def analyze_document(self, text: str, session_id: str = None) -> dict:
+    async def _generate(self, route: dict, messages: list) -> tuple:
+        """
+        Returns (answer, route). An answer from a cheap route that fails, is
+        empty or is cut off by max_tokens is regenerated one stage up.
+        """
+        try:
+            response = await model_router.complete(route, messages)
+            choice = response.choices[0]
+            if choice.message.content and choice.finish_reason != "length":
+                return choice.message.content, route
+            escalated = model_router.escalate(route, "cut off" if choice.finish_reason == "length" else "empty answer")
+            if not escalated:
+                return choice.message.content, route
+        except Exception as e:
+            escalated = model_router.escalate(route, e.__class__.__name__)
+            if not escalated:
+                raise
+
+        response = await model_router.complete(escalated, messages)
+        return response.choices[0].message.content, escalated
+
+    def _route_debug(self, route: dict) -> dict:
+        if not route:
+            return None
+        return {"stage": route["stage"], "model": route["model"], "reason": route["reason"]}
+
+    def _remember_answer(self, context: dict, message: str, category: str, answer: str):
+        if context["cacheable"] and answer:
+            self._spawn(self.answer_cache.store(message, context["query_embedding"], category, answer, context["sources"]))
+
+    async def _web_search_branch(self, message: str, use_web_search: bool, query_embedding, retrieval: asyncio.Task, timings: dict) -> list:
+        """
+        Search decision followed by the web search. The decision is local
+        (heuristics, exemplars, retrieval scores) unless it is ambiguous.
+        """
+        search_query = None
+
+        if use_web_search:
+            # Force search logic
+            print(f"Forced Web Search for: {message}")
+            search_query = message
+            if "kenya" not in message.lower():
+                search_query += " in Kenya"
+        else:
+            # Agentic check
+            search_decision = await self._timed(timings, "search_decision", search_decider.decide(message, query_embedding, retrieval))
+            if search_decision:
+                print(f"Agent decided to search with query: {search_decision}")
+                search_query = search_decision
+
+        if not search_query:
+            return []
+        return await self._timed(timings, "web_search", self.web_search.search(search_query, max_results=3))
+
+    async def _timed(self, timings: dict, stage: str, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _spawn(self, coro):
+        # Keep a reference so the task isn't garbage collected mid-flight
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _ensure_session(self, session_id: str, title: str):
+        # Ensure session exists (even if passed from client)
+        query = "INSERT INTO chat_sessions (id, title) VALUES ($1, $2) ON CONFLICT (id) DO NOTHING"
+        await db.execute(query, session_id, title)
+
+    async def _persist_interaction(self, session_id: str, message: str, answer: str, category: str):
+        # Sequential on purpose: history is ordered by created_at
+        await self._save_message(session_id, "user", message, metadata={"category": category})
+        await self._save_assistant_turn(session_id, answer)
+
+    async def _save_assistant_turn(self, session_id: str, answer: str, metadata: dict = None):
+        await self._save_message(session_id, "assistant", answer, metadata=metadata)
+        # Fold turns that left the verbatim window into the session summary
+        await session_memory.fold(session_id)
+
+    async def analyze_document(self, text: str, session_id: str = None, on_progress=None) -> dict:
         """
         Delegates to ContractAnalyzer and persists context if session_id is provided.
         """
-        analysis = await self.contract_analyzer.analyze_contract(text)
-        
+        analysis = await self.contract_analyzer.analyze_contract(text, on_progress)
+
         if session_id:
-            # Ensure session exists in DB (to satistfy FK for messages)
-            create_session_query = "INSERT INTO chat_sessions (id, title) VALUES ($1, $2) ON CONFLICT (id) DO NOTHING"
-            await db.execute(create_session_query, session_id, "Document Upload Analysis")
-
-            # 1. Save Document Content as Context (System/User Context)
-            # Truncate if necessary, but for now we save it.
-            # We'll use a special format or just user message.
-            readable_text = f"User uploaded a document. Content preview:\n{text[:2000]}..." if len(text) > 2000 else f"User uploaded a document. Content:\n{text}"
-            await self._save_message(session_id, "user", readable_text)
-            
-            # 2. Save Analysis as Assistant Message
-            summary = analysis.get("assessment_summary", "Document analyzed.")
-            await self._save_message(session_id, "assistant", f"I've analyzed the document. Summary: {summary}")
-            
+            await self.save_document_analysis(session_id, text, analysis)
+
         return analysis
-            
 
-        
+    async def save_document_analysis(self, session_id: str, text: str, analysis: dict):
+        # Ensure session exists in DB (to satistfy FK for messages)
+        await self._ensure_session(session_id, "Document Upload Analysis")
+
+        # 1. Save Document Content as Context (System/User Context)
+        # Truncate if necessary, but for now we save it.
+        # We'll use a special format or just user message.
+        readable_text = f"User uploaded a document. Content preview:\n{text[:2000]}..." if len(text) > 2000 else f"User uploaded a document. Content:\n{text}"
+        await self._save_message(session_id, "user", readable_text)
+
+        # 2. Save Analysis as Assistant Message
+        summary = analysis.get("assessment_summary", "Document analyzed.")
+        await self._save_message(session_id, "assistant", f"I've analyzed the document. Summary: {summary}")
+
     async def _get_chat_history(self, session_id: str, limit: int = 5) -> list:
         query = "SELECT role, content FROM messages WHERE session_id = $1 ORDER BY created_at DESC LIMIT $2"
         rows = await db.fetch(query, session_id, limit)
@@ -139,24 +333,3 @@ class AgentService:
     async def get_session_messages(self, session_id: str) -> list:
         # Re-using internal logic but exposing formatting
         return await self._get_chat_history(session_id, limit=50)
-
-    async def _decide_search_need(self, message: str, context: str) -> str | None:
-        """
-        Uses LLM to decide if a search is needed. Returns search query or None.
-        """
-        decision_prompt = SEARCH_DECISION_PROMPT.format(context=context, question=message)
-        
-        try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": decision_prompt}],
-                temperature=0.0
-            )
-            result = response.choices[0].message.content.strip()
-            
-            if "NO_SEARCH" in result:
-                return None
-            return result
-        except Exception as e:
-            print(f"Search decision failed: {e}")
-            return None
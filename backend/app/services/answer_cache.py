@@ -0,0 +1,124 @@
+from app.config import settings
+from app.models.database import db
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+import time
+import uuid
+
+class SemanticAnswerCache:
+    """
+    In-process cache of previous answers, looked up by cosine similarity of
+    the query embedding. Entries are scoped by chat category, expire after a
+    TTL, and are evicted least-recently-used once max_entries is reached.
+
+    The whole cache is dropped whenever the corpus version changes, which
+    the triggers in database/init.sql bump on any write to documents or
+    document_chunks.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds: int = settings.ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = settings.ANSWER_CACHE_MAX_ENTRIES,
+        version_check_seconds: float = settings.ANSWER_CACHE_VERSION_CHECK_SECONDS
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_check_seconds = version_check_seconds
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        # category -> (keys, matrix of unit vectors), rebuilt lazily
+        self._matrices: dict[str, tuple[list, np.ndarray]] = {}
+        self._corpus_version = None
+        self._version_checked_at = 0.0
+
+    async def lookup(self, embedding: np.ndarray, category: str) -> Optional[dict]:
+        if not await self._sync_corpus_version():
+            return None
+
+        keys, matrix = self._category_matrix(category)
+        if not keys:
+            return None
+
+        scores = matrix @ self._normalize(embedding)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        key = keys[best]
+        entry = self._entries[key]
+        if entry["expires_at"] < time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return {
+            "query": entry["query"],
+            "response": entry["response"],
+            "sources": entry["sources"],
+            "similarity": float(scores[best])
+        }
+
+    async def store(self, query: str, embedding: np.ndarray, category: str, response: str, sources: list):
+        if not await self._sync_corpus_version():
+            return
+
+        key = str(uuid.uuid4())
+        self._entries[key] = {
+            "query": query,
+            "category": category,
+            "embedding": self._normalize(embedding),
+            "response": response,
+            "sources": sources,
+            "expires_at": time.monotonic() + self.ttl_seconds
+        }
+        self._matrices.pop(category, None)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate(self):
+        self._entries.clear()
+        self._matrices.clear()
+
+    async def _sync_corpus_version(self) -> bool:
+        """
+        Re-reads the corpus version at most every version_check_seconds.
+        Returns False if it can't be read, in which case the cache is bypassed.
+        """
+        now = time.monotonic()
+        if self._corpus_version is not None and now - self._version_checked_at < self.version_check_seconds:
+            return True
+
+        try:
+            version = await db.fetch_val("SELECT SUM(version)::bigint FROM corpus_state")
+        except Exception as e:
+            print(f"Answer cache disabled, corpus version unavailable: {e}")
+            return False
+
+        if version != self._corpus_version:
+            self.invalidate()
+            self._corpus_version = version
+        self._version_checked_at = now
+        return True
+
+    def _category_matrix(self, category: str) -> tuple[list, np.ndarray]:
+        if category not in self._matrices:
+            keys = [k for k, e in self._entries.items() if e["category"] == category]
+            matrix = np.vstack([self._entries[k]["embedding"] for k in keys]) if keys else None
+            self._matrices[category] = (keys, matrix)
+        return self._matrices[category]
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._matrices.pop(entry["category"], None)
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,216 @@
+from app.models.database import get_database_pool
+from collections import defaultdict
+from typing import Dict, List, Optional
+import hashlib
+import json
+import numpy as np
+import uuid
+
+CHUNK_COLUMNS = ["id", "document_id", "chunk_text", "chunk_index", "embedding", "metadata", "document_type", "content_hash"]
+
+def chunk_hash(text: str) -> str:
+    # Matches the init.sql backfill: encode(sha256(convert_to(chunk_text, 'UTF8')), 'hex')
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class DocumentChangedError(RuntimeError):
+    """The stored chunks changed between planning a sync and writing it."""
+
+class ChunkWriter:
+    """
+    Writes document rows and all of their chunks in a single transaction,
+    streaming the chunks with COPY (embeddings go through the pool's binary
+    pgvector codec) instead of one INSERT per chunk.
+    """
+
+    async def write_document(
+        self,
+        doc_id,
+        title: str,
+        content: str,
+        document_type: str,
+        source_url: Optional[str],
+        metadata: dict,
+        chunks: List[str],
+        embeddings: List[np.ndarray],
+        chunk_metadata: Optional[List[dict]] = None,
+        document_key: Optional[str] = None
+    ) -> int:
+        written = await self.write_documents([{
+            "id": doc_id,
+            "title": title,
+            "content": content,
+            "document_type": document_type,
+            "source_url": source_url,
+            "metadata": metadata,
+            "chunks": chunks,
+            "embeddings": embeddings,
+            "chunk_metadata": chunk_metadata,
+            "document_key": document_key
+        }])
+        return len(chunks) if written else 0
+
+    async def write_documents(self, documents: List[dict]) -> List[str]:
+        """
+        Writes several documents (dicts with the write_document arguments as
+        keys) with one document INSERT and one COPY for all chunks.
+
+        A document whose document_key is already taken (stored earlier, by a
+        concurrent writer, or twice in this batch) is skipped along with its
+        chunks rather than failing the batch. Returns the ids written.
+        """
+        document_rows = []
+        chunk_records = []
+
+        for doc in documents:
+            chunks, embeddings = doc["chunks"], doc["embeddings"]
+            if len(chunks) != len(embeddings):
+                raise ValueError(f"Got {len(embeddings)} embeddings for {len(chunks)} chunks")
+
+            document_rows.append((
+                str(doc["id"]), doc["title"], doc["content"], doc["document_type"],
+                doc.get("source_url"), json.dumps(doc.get("metadata") or {}), doc.get("document_key")
+            ))
+
+            chunk_metadata = doc.get("chunk_metadata") or [None] * len(chunks)
+            for i, (chunk, embedding, meta) in enumerate(zip(chunks, embeddings, chunk_metadata)):
+                chunk_records.append(self._chunk_record(doc["id"], doc["document_type"], i, chunk, embedding, meta))
+
+        if not document_rows:
+            return []
+
+        pool = await get_database_pool()
+        async with pool.acquire() as conn:
+            # Documents only become visible together with their chunks
+            async with conn.transaction():
+                rows = await conn.fetch("""
+                    INSERT INTO documents (id, title, content, document_type, source_url, metadata, document_key)
+                    SELECT * FROM unnest($1::uuid[], $2::text[], $3::text[], $4::varchar[], $5::text[], $6::jsonb[], $7::text[])
+                    ON CONFLICT (document_key) WHERE document_key IS NOT NULL DO NOTHING
+                    RETURNING id
+                """, *(list(column) for column in zip(*document_rows)))
+                written = {str(row["id"]) for row in rows}
+
+                chunk_records = [record for record in chunk_records if str(record[1]) in written]
+                if chunk_records:
+                    await conn.copy_records_to_table("document_chunks", records=chunk_records, columns=CHUNK_COLUMNS)
+
+        return [str(doc["id"]) for doc in documents if str(doc["id"]) in written]
+
+    async def fetch_chunk_hashes(self, doc_id) -> set:
+        pool = await get_database_pool()
+        rows = await pool.fetch("SELECT DISTINCT content_hash FROM document_chunks WHERE document_id = $1", doc_id)
+        return {row["content_hash"] for row in rows}
+
+    async def sync_document(
+        self,
+        doc_id,
+        title: str,
+        content: str,
+        document_type: str,
+        source_url: Optional[str],
+        metadata: dict,
+        chunks: List[str],
+        embeddings: Dict[str, np.ndarray],
+        chunk_metadata: Optional[List[dict]] = None,
+        document_key: Optional[str] = None
+    ) -> dict:
+        """
+        Upserts a document and brings its chunks in line with `chunks` in one
+        transaction: chunks whose text (hash) is unchanged keep their row and
+        embedding, new ones are inserted and vanished ones deleted. Only
+        position/metadata changes of kept chunks are written as UPDATEs.
+
+        embeddings maps content hash -> embedding and must cover every chunk
+        whose hash isn't stored yet (see fetch_chunk_hashes).
+        """
+        chunk_metadata = chunk_metadata or [None] * len(chunks)
+        hashes = [chunk_hash(chunk) for chunk in chunks]
+
+        pool = await get_database_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    INSERT INTO documents (id, title, content, document_type, source_url, metadata, document_key)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7)
+                    ON CONFLICT (id) DO UPDATE SET
+                        title = EXCLUDED.title,
+                        content = EXCLUDED.content,
+                        document_type = EXCLUDED.document_type,
+                        source_url = EXCLUDED.source_url,
+                        metadata = EXCLUDED.metadata,
+                        document_key = EXCLUDED.document_key,
+                        last_updated = NOW()
+                """, doc_id, title, content, document_type, source_url, json.dumps(metadata or {}), document_key)
+
+                # The document row is now locked, so the stored chunks can't move under us
+                existing = await conn.fetch("""
+                    SELECT id, content_hash, chunk_index, metadata
+                    FROM document_chunks
+                    WHERE document_id = $1
+                    ORDER BY chunk_index
+                """, doc_id)
+
+                # Hash -> stored rows; a list because boilerplate can repeat within a document
+                stored = defaultdict(list)
+                for row in existing:
+                    stored[row["content_hash"]].append(row)
+
+                inserts, updates = [], []
+                for i, (chunk, h, meta) in enumerate(zip(chunks, hashes, chunk_metadata)):
+                    if stored[h]:
+                        row = stored[h].pop(0)
+                        stored_meta = json.loads(row["metadata"]) if row["metadata"] else None
+                        if row["chunk_index"] != i or stored_meta != (meta or None):
+                            updates.append((row["id"], i, json.dumps(meta) if meta else None))
+                        continue
+
+                    if h not in embeddings:
+                        raise DocumentChangedError(f"Chunks of document {doc_id} changed during re-ingestion")
+                    inserts.append(self._chunk_record(doc_id, document_type, i, chunk, embeddings[h], meta))
+
+                deletes = [row["id"] for rows in stored.values() for row in rows]
+
+                if deletes:
+                    await conn.execute("DELETE FROM document_chunks WHERE id = ANY($1::uuid[])", deletes)
+                if updates:
+                    # chunk_index and metadata aren't indexed and don't bump change_seq,
+                    # so these can be HOT updates that leave the HNSW and GIN indexes alone
+                    await conn.executemany("""
+                        UPDATE document_chunks SET chunk_index = $2, metadata = $3 WHERE id = $1
+                    """, updates)
+                await conn.execute("""
+                    UPDATE document_chunks SET document_type = $2
+                    WHERE document_id = $1 AND document_type IS DISTINCT FROM $2
+                """, doc_id, document_type)
+                if inserts:
+                    await conn.copy_records_to_table("document_chunks", records=inserts, columns=CHUNK_COLUMNS)
+
+        return {
+            "chunks": len(chunks),
+            "kept": len(chunks) - len(inserts),
+            "inserted": len(inserts),
+            "updated": len(updates),
+            "deleted": len(deletes)
+        }
+
+    async def delete_document(self, doc_id):
+        pool = await get_database_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                # Chunks first (cascade usually handles this, but explicit is safe)
+                await conn.execute("DELETE FROM document_chunks WHERE document_id = $1", doc_id)
+                await conn.execute("DELETE FROM documents WHERE id = $1", doc_id)
+
+    def _chunk_record(self, doc_id, document_type: str, index: int, chunk: str, embedding, meta: Optional[dict]) -> tuple:
+        return (
+            uuid.uuid4(),
+            doc_id,
+            chunk,
+            index,
+            np.asarray(embedding, dtype=np.float32),
+            json.dumps(meta) if meta else None,
+            document_type,
+            chunk_hash(chunk)
+        )
+
+chunk_writer = ChunkWriter()
@@ -0,0 +1,227 @@
+from app.config import settings
+from app.utils.tokens import count_tokens, get_encoding
+from typing import Iterable, Iterator, Optional, Tuple, Union
+import re
+
+# "PART II", "CHAPTER 3", "Section 40.", "ARTICLE 12 - WAGES", "Schedule 1"
+HEADING_PATTERN = re.compile(
+    r"^(part|chapter|article|section|clause|schedule)\s+([0-9]+[a-z]?|[ivxlc]+)\b",
+    re.IGNORECASE
+)
+# "12.", "4.2", "(3)", "(a)", "(iv)" at the start of a line
+CLAUSE_PATTERN = re.compile(r"^(\d+(\.\d+)*\.?|\(\d+[a-z]?\)|\([a-z]{1,4}\))\s+\S", re.IGNORECASE)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.;:!?])\s+")
+MINOR_WORDS = {"a", "an", "and", "by", "for", "in", "of", "on", "or", "the", "to", "with"}
+MAX_SECTION_LABEL = 120
+
+Segment = Tuple[Optional[int], str]
+
+class Chunker:
+    """
+    Splits documents into chunks that follow their legal structure: headings,
+    "Section N" and numbered clauses start new units, units are packed into
+    chunks by token count, and a chunk is closed at a section boundary once
+    it is big enough to stand alone.
+
+    iter_chunks is a generator, so only the chunk being assembled is held in
+    memory. Each chunk is {"text", "tokens", "metadata"}, with the section(s)
+    and page range it came from in metadata.
+    """
+
+    def __init__(
+        self,
+        target_tokens: int = settings.CHUNK_TARGET_TOKENS,
+        max_tokens: int = settings.CHUNK_MAX_TOKENS,
+        min_tokens: int = settings.CHUNK_MIN_TOKENS,
+        overlap_tokens: int = settings.CHUNK_OVERLAP_TOKENS,
+        model: str = settings.EMBEDDING_MODEL
+    ):
+        self.target_tokens = target_tokens
+        self.max_tokens = max(max_tokens, target_tokens)
+        self.min_tokens = min_tokens
+        self.overlap_tokens = overlap_tokens
+        self.model = model
+
+    def iter_chunks(self, source: Union[str, Iterable[Segment]]) -> Iterator[dict]:
+        """
+        source is either plain text or an iterable of (page_number, text)
+        segments; page_number may be None when the format has no pages.
+        """
+        if isinstance(source, str):
+            source = [(None, source)]
+
+        stream = self.stream()
+        for page, text in source:
+            yield from stream.feed(text, page)
+        yield from stream.finish()
+
+    def stream(self) -> "ChunkStream":
+        """Incremental interface for producers that can't be iterated synchronously."""
+        return ChunkStream(self)
+
+    def chunk(self, source: Union[str, Iterable[Segment]]) -> list[str]:
+        return [c["text"] for c in self.iter_chunks(source)]
+
+    def _iter_units(self, segments: Iterable[Segment]) -> Iterator[dict]:
+        """
+        Yields paragraphs, clauses and headings in document order. Lines are
+        grouped into a unit until a blank line, a page break or a line that
+        starts a new heading or clause.
+        """
+        for page, text in segments:
+            lines = []
+            for line in (text or "").splitlines():
+                stripped = line.strip()
+                kind = self._classify(stripped) if stripped else None
+
+                if lines and (not stripped or kind):
+                    yield {"text": "\n".join(lines), "page": page, "heading": False}
+                    lines = []
+
+                if kind == "heading":
+                    yield {"text": stripped, "page": page, "heading": True}
+                elif stripped:
+                    lines.append(stripped)
+
+            if lines:
+                yield {"text": "\n".join(lines), "page": page, "heading": False}
+
+    def _classify(self, line: str) -> Optional[str]:
+        if HEADING_PATTERN.match(line):
+            return "heading"
+
+        clause = CLAUSE_PATTERN.match(line)
+        title = line[clause.end(1):].strip() if clause else line
+        words = title.split()
+        if 0 < len(words) <= 10 and not title.endswith((".", ",", ";", ":")):
+            letters = [c for c in title if c.isalpha()]
+            # "COLLECTIVE BARGAINING AGREEMENT", "12. Annual Leave"
+            if len(letters) > 2 and title.isupper():
+                return "heading"
+            if clause and all(w[0].isupper() or w.lower() in MINOR_WORDS for w in words if w[0].isalpha()):
+                return "heading"
+
+        return "clause" if clause else None
+
+    def _split_oversized(self, text: str) -> Iterator[Tuple[str, int]]:
+        """
+        Yields (text, tokens) pieces that fit in a chunk, splitting on
+        sentence boundaries first and on raw tokens only as a last resort.
+        """
+        # Leave room for the section label carried into continuation chunks
+        limit = max(self.max_tokens - self.overlap_tokens - 48, 1)
+        tokens = count_tokens(text, self.model)
+        if tokens <= limit:
+            yield text, tokens
+            return
+
+        current, current_tokens = [], 0
+        for sentence in SENTENCE_BOUNDARY.split(text):
+            sentence_tokens = count_tokens(sentence, self.model)
+            if current and current_tokens + sentence_tokens > limit:
+                yield " ".join(current), current_tokens
+                current, current_tokens = [], 0
+
+            if sentence_tokens > limit:
+                encoding = get_encoding(self.model)
+                ids = encoding.encode(sentence, disallowed_special=())
+                for start in range(0, len(ids), limit):
+                    window = ids[start:start + limit]
+                    yield encoding.decode(window), len(window)
+                continue
+
+            current.append(sentence)
+            current_tokens += sentence_tokens
+
+        if current:
+            yield " ".join(current), current_tokens
+
+    def _continuation(self, previous: list, section: Optional[str], next_tokens: int) -> list:
+        """
+        Opening pieces for a chunk that continues a section: the section label
+        (so the chunk is self-describing) and the last sentences of the
+        previous chunk, as long as everything still fits under max_tokens.
+        """
+        pieces = []
+        budget = self.max_tokens - next_tokens
+
+        if section and previous[-1]["section"] == section:
+            label_tokens = count_tokens(section, self.model)
+            if label_tokens <= budget:
+                pieces.append({"text": section, "tokens": label_tokens, "page": None, "section": None})
+                budget -= label_tokens
+
+        last = previous[-1]
+        if self.overlap_tokens and last["section"] == section:
+            tail, tail_tokens = [], 0
+            for sentence in reversed(SENTENCE_BOUNDARY.split(last["text"])):
+                sentence_tokens = count_tokens(sentence, self.model)
+                if tail_tokens + sentence_tokens > min(self.overlap_tokens, budget):
+                    break
+                tail.insert(0, sentence)
+                tail_tokens += sentence_tokens
+            # Skip when the "tail" would be the whole piece again
+            if tail and tail_tokens < last["tokens"]:
+                pieces.append({"text": " ".join(tail), "tokens": tail_tokens, "page": last["page"], "section": section})
+
+        return pieces
+
+    def _emit(self, pieces: list) -> dict:
+        text = "\n".join(p["text"] for p in pieces)
+        metadata = {}
+
+        sections = []
+        for p in pieces:
+            if p["section"] and p["section"] not in sections:
+                sections.append(p["section"])
+        if sections:
+            metadata["section"] = sections[0]
+        if len(sections) > 1:
+            metadata["sections"] = sections
+
+        pages = [p["page"] for p in pieces if p["page"] is not None]
+        if pages:
+            metadata["page_start"] = min(pages)
+            metadata["page_end"] = max(pages)
+
+        return {"text": text, "tokens": sum(p["tokens"] for p in pieces), "metadata": metadata}
+
+class ChunkStream:
+    """
+    Chunker state across segments: feed() each page as it arrives and
+    collect the chunks it completes, then finish() for the last one.
+    """
+
+    def __init__(self, chunker: Chunker):
+        self.chunker = chunker
+        self.pieces = []
+        self.size = 0
+        self.section = None
+
+    def feed(self, text: str, page: Optional[int] = None) -> Iterator[dict]:
+        chunker = self.chunker
+        for unit in chunker._iter_units([(page, text)]):
+            if unit["heading"]:
+                # New section: close the current chunk unless it's too small to stand alone
+                if self.pieces and self.size >= chunker.min_tokens:
+                    yield chunker._emit(self.pieces)
+                    self.pieces, self.size = [], 0
+                self.section = unit["text"][:MAX_SECTION_LABEL]
+
+            for piece_text, tokens in chunker._split_oversized(unit["text"]):
+                piece = {"text": piece_text, "tokens": tokens, "page": unit["page"], "section": self.section}
+
+                if self.pieces and self.size + tokens > chunker.target_tokens:
+                    yield chunker._emit(self.pieces)
+                    self.pieces = chunker._continuation(self.pieces, self.section, tokens)
+                    self.size = sum(p["tokens"] for p in self.pieces)
+
+                self.pieces.append(piece)
+                self.size += tokens
+
+    def finish(self) -> Iterator[dict]:
+        if self.pieces:
+            yield self.chunker._emit(self.pieces)
+            self.pieces, self.size = [], 0
+
+chunker = Chunker()
@@ -1,32 +1,76 @@
+import asyncio
+import hashlib
 import json
-from openai import AsyncOpenAI
+import re
 from app.config import settings
-from app.utils.prompt_templates import CONTRACT_REVIEW_SYSTEM_PROMPT
+from app.services.chunker import Chunker
+from app.services.contract_cache import contract_cache
+from app.services.model_router import model_router
+from app.utils.prompt_templates import CONTRACT_REVIEW_SYSTEM_PROMPT, CONTRACT_SEGMENT_PROMPT
+from app.utils.tokens import count_tokens
+from typing import Awaitable, Callable, Optional
+
+# Protections a Kenyan employment contract is expected to cover. In segmented
+# analysis a clause is "missing" when no segment reports it.
+STANDARD_CLAUSES = [
+    "Job Title and Duties",
+    "Remuneration",
+    "Hours of Work",
+    "Overtime",
+    "Annual Leave",
+    "Sick Leave",
+    "Maternity/Paternity Leave",
+    "Probation",
+    "Termination Notice",
+    "Statutory Deductions (NSSF/NHIF/PAYE)",
+    "Dispute Resolution",
+]
+RISK_ORDER = {"high": 0, "medium": 1, "low": 2}
+# Points taken off the merged score for each missing standard clause
+MISSING_CLAUSE_PENALTY = 3
+WHITESPACE = re.compile(r"\s+")
 
 class ContractAnalyzer:
+    """
+    Contracts up to CONTRACT_SINGLE_PASS_MAX_TOKENS are reviewed in one call.
+    Longer ones (annexes, appendices) are split into clause-aligned segments
+    that are reviewed concurrently and merged without another model call,
+    so wall time follows the slowest segment rather than the contract length.
+
+    Results are cached by contract fingerprint (see ContractAnalysisCache);
+    cached results carry a "cache" entry saying how they matched.
+
+    on_progress, if given, is awaited with {"analysis", "segments"} each
+    time a segment finishes: the concerns and compliant terms found so far.
+    Score, summary and missing clauses only exist once all segments are in.
+    """
+
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.segmenter = Chunker(
+            target_tokens=settings.CONTRACT_SEGMENT_TOKENS,
+            max_tokens=int(settings.CONTRACT_SEGMENT_TOKENS * 1.33),
+            min_tokens=settings.CONTRACT_SEGMENT_TOKENS // 2,
+            overlap_tokens=0,
+            model=settings.CONTRACT_ANALYSIS_MODEL
+        )
 
-    async def analyze_contract(self, contract_text: str) -> dict:
+    async def analyze_contract(self, contract_text: str, on_progress: Optional[Callable[[dict], Awaitable[None]]] = None) -> dict:
         """
         Analyzes a contract text and returns structured risk assessment.
         """
+        signature = None
+        if settings.CONTRACT_CACHE_ENABLED:
+            signature = contract_cache.signature(contract_text)
+            cached = await contract_cache.lookup(signature, self.analysis_version())
+            if cached:
+                print(f"Contract analysis cache hit ({cached['match']})")
+                return {**cached["analysis"], "cache": {"match": cached["match"]}}
+
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": CONTRACT_REVIEW_SYSTEM_PROMPT.format(contract_text=contract_text)},
-                    {"role": "user", "content": "Please analyze this contract."}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.2
-            )
-            
-            content = response.choices[0].message.content
-            if not content:
-                raise ValueError("Empty response from AI")
-                
-            return json.loads(content)
+            if count_tokens(contract_text) <= settings.CONTRACT_SINGLE_PASS_MAX_TOKENS:
+                analysis = await self._analyze_whole(contract_text)
+            else:
+                analysis = await self._analyze_segmented(contract_text, on_progress)
         except Exception as e:
             print(f"Error analyzing contract: {e}")
             return {
@@ -36,5 +80,170 @@ class ContractAnalyzer:
                 "areas_of_concern": [
                     {"clause": "N/A", "risk_level": "High", "explanation": f"System Error: {str(e)}", "recommendation": "Retry analysis"}
                 ],
-                "missing_clauses": []
+                "missing_clauses": [],
+                "error": str(e)
             }
+
+        # Incomplete results (segments that failed) are worth retrying, so not cached
+        if signature and not (analysis.get("segments") or {}).get("failed"):
+            await contract_cache.store(signature, self.analysis_version(), analysis)
+        return analysis
+
+    def analysis_version(self) -> str:
+        """Changes whenever the prompts, model or segmentation would change the result."""
+        parts = [
+            CONTRACT_REVIEW_SYSTEM_PROMPT,
+            CONTRACT_SEGMENT_PROMPT,
+            "\n".join(STANDARD_CLAUSES),
+            settings.CONTRACT_ANALYSIS_MODEL,
+            str(settings.CONTRACT_SINGLE_PASS_MAX_TOKENS),
+            str(settings.CONTRACT_SEGMENT_TOKENS),
+        ]
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+    async def _analyze_whole(self, contract_text: str) -> dict:
+        response = await model_router.complete(
+            model_router.route("contract_analysis"),
+            [
+                {"role": "system", "content": CONTRACT_REVIEW_SYSTEM_PROMPT.format(contract_text=contract_text)},
+                {"role": "user", "content": "Please analyze this contract."}
+            ],
+            response_format={"type": "json_object"}
+        )
+
+        content = response.choices[0].message.content
+        if not content:
+            raise ValueError("Empty response from AI")
+
+        return json.loads(content)
+
+    async def _analyze_segmented(self, contract_text: str, on_progress=None) -> dict:
+        segments = list(self.segmenter.iter_chunks(contract_text))
+        for i, segment in enumerate(segments):
+            segment["label"] = segment["metadata"].get("section") or f"Part {i + 1}"
+        print(f"Analyzing contract in {len(segments)} segments")
+
+        semaphore = asyncio.Semaphore(settings.CONTRACT_ANALYSIS_CONCURRENCY)
+        progress_lock = asyncio.Lock()
+        finished = {}
+
+        async def run(i: int, segment: dict):
+            result = await self._analyze_segment(segment, semaphore)
+            if on_progress:
+                # Serialized, so a slower publish can't overwrite a newer one
+                async with progress_lock:
+                    finished[i] = result
+                    await self._report(segments, finished, on_progress)
+            return result
+
+        results = await asyncio.gather(*(run(i, segment) for i, segment in enumerate(segments)))
+
+        if not any(results):
+            raise ValueError("All contract segments failed to analyze")
+        return self._merge(segments, results)
+
+    async def _analyze_segment(self, segment: dict, semaphore: asyncio.Semaphore):
+        """Partial analysis of one segment, or None if it failed."""
+        prompt = CONTRACT_SEGMENT_PROMPT.format(
+            section=segment["label"],
+            checklist="\n".join(f"- {c}" for c in STANDARD_CLAUSES),
+            contract_text=segment["text"]
+        )
+        async with semaphore:
+            try:
+                response = await model_router.complete(
+                    model_router.route("contract_analysis"),
+                    [
+                        {"role": "system", "content": prompt},
+                        {"role": "user", "content": "Please analyze this part of the contract."}
+                    ],
+                    response_format={"type": "json_object"}
+                )
+                content = response.choices[0].message.content
+                if not content:
+                    raise ValueError("Empty response from AI")
+                return json.loads(content)
+            except Exception as e:
+                print(f"Contract segment '{segment['label']}' failed: {e}")
+                return None
+
+    async def _report(self, segments: list, finished: dict, on_progress):
+        done = sorted(finished)
+        partial = self._merge([segments[i] for i in done], [finished[i] for i in done])
+        try:
+            await on_progress({
+                "analysis": {"areas_of_concern": partial["areas_of_concern"], "compliant_terms": partial["compliant_terms"]},
+                "segments": {"done": len(done), "total": len(segments), "failed": partial["segments"]["failed"]}
+            })
+        except Exception as e:
+            print(f"Contract progress update failed: {e}")
+
+    def _merge(self, segments: list, results: list) -> dict:
+        """
+        Deterministic merge into the single-pass schema: terms and concerns
+        deduplicated in document order (concerns then by risk), missing
+        clauses from the checklist, and the segment scores averaged by size.
+        """
+        compliant_terms, concerns = {}, {}
+        present = set()
+        weighted_score, weight = 0.0, 0
+        failed = []
+
+        for segment, result in zip(segments, results):
+            if result is None:
+                failed.append(segment["label"])
+                continue
+
+            for term in result.get("compliant_terms") or []:
+                if isinstance(term, dict) and term.get("term"):
+                    compliant_terms.setdefault(self._normalize(term["term"]), term)
+
+            for concern in result.get("areas_of_concern") or []:
+                if not isinstance(concern, dict) or not concern.get("clause"):
+                    continue
+                key = self._normalize(concern["clause"])[:200]
+                # The same excerpt reported twice (overlapping wording) keeps the higher risk
+                if key not in concerns or self._risk(concern) < self._risk(concerns[key]):
+                    concerns[key] = concern
+
+            names = {self._normalize(c) for c in result.get("clauses_present") or [] if isinstance(c, str)}
+            present.update(c for c in STANDARD_CLAUSES if self._normalize(c) in names)
+
+            try:
+                score = min(max(float(result.get("score")), 1.0), 100.0)
+            except (TypeError, ValueError):
+                continue
+            weighted_score += score * segment["tokens"]
+            weight += segment["tokens"]
+
+        missing = [c for c in STANDARD_CLAUSES if c not in present]
+        areas_of_concern = sorted(concerns.values(), key=self._risk)
+        overall_score = round(weighted_score / weight) if weight else 50
+        overall_score = max(overall_score - MISSING_CLAUSE_PENALTY * len(missing), 1)
+
+        counts = {level: sum(1 for c in areas_of_concern if self._risk(c) == rank) for level, rank in RISK_ORDER.items()}
+        summary = (
+            f"Reviewed {len(segments)} sections: {counts['high']} high-, {counts['medium']} medium- and "
+            f"{counts['low']} low-risk concerns, and {len(compliant_terms)} compliant terms."
+        )
+        if missing:
+            summary += f" Not covered: {', '.join(missing)}."
+        if failed:
+            summary += f" {len(failed)} section(s) could not be analyzed: {', '.join(failed)}."
+
+        return {
+            "overall_score": overall_score,
+            "assessment_summary": summary,
+            "compliant_terms": list(compliant_terms.values()),
+            "areas_of_concern": areas_of_concern,
+            "missing_clauses": missing,
+            "segments": {"count": len(segments), "failed": failed}
+        }
+
+    @staticmethod
+    def _risk(concern: dict) -> int:
+        return RISK_ORDER.get(str(concern.get("risk_level", "")).strip().lower(), len(RISK_ORDER))
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return WHITESPACE.sub(" ", str(text)).strip().lower()
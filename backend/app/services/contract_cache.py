@@ -0,0 +1,75 @@
+from app.config import settings
+from app.models.database import db
+from typing import Optional
+import hashlib
+import json
+import re
+
+WORD_PATTERN = re.compile(r"\w+")
+
+class ContractAnalysisCache:
+    """
+    Persistent cache of contract analyses in the contract_analysis_cache
+    table, keyed by analysis version (prompts, model and segmentation
+    settings) and a fingerprint of the normalized contract text.
+
+    Only exact matches are reused: an analysis quotes the contract's clauses,
+    names, dates and salaries, so serving it for a merely similar contract
+    would show one user another's personal data. The contract text itself is
+    never stored, and entries older than CONTRACT_CACHE_TTL_DAYS are purged.
+    """
+
+    def __init__(self, ttl_days: int = settings.CONTRACT_CACHE_TTL_DAYS):
+        self.ttl_days = ttl_days
+
+    def signature(self, text: str) -> dict:
+        """Returns {"fingerprint"} for text (case, punctuation and whitespace ignored)."""
+        words = WORD_PATTERN.findall(text.lower())
+        return {"fingerprint": hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()}
+
+    async def lookup(self, signature: dict, version: str) -> Optional[dict]:
+        """Returns {"analysis", "match"} with match "exact", or None on a miss."""
+        try:
+            analysis = await db.fetch_val("""
+                SELECT analysis FROM contract_analysis_cache
+                WHERE analysis_version = $1 AND fingerprint = $2
+                  AND created_at > NOW() - make_interval(days => $3)
+            """, version, signature["fingerprint"], self.ttl_days)
+        except Exception as e:
+            print(f"Contract cache lookup failed: {e}")
+            return None
+
+        if analysis is None:
+            return None
+
+        await self._touch(version, signature["fingerprint"])
+        return {"analysis": json.loads(analysis), "match": "exact"}
+
+    async def store(self, signature: dict, version: str, analysis: dict):
+        try:
+            await db.execute("""
+                INSERT INTO contract_analysis_cache (analysis_version, fingerprint, analysis)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (analysis_version, fingerprint)
+                DO UPDATE SET analysis = EXCLUDED.analysis, created_at = NOW()
+            """, version, signature["fingerprint"], json.dumps(analysis))
+            await self.purge_expired()
+        except Exception as e:
+            print(f"Contract cache write failed: {e}")
+
+    async def purge_expired(self):
+        await db.execute(
+            "DELETE FROM contract_analysis_cache WHERE created_at <= NOW() - make_interval(days => $1)",
+            self.ttl_days
+        )
+
+    async def _touch(self, version: str, fingerprint: str):
+        try:
+            await db.execute("""
+                UPDATE contract_analysis_cache SET hits = hits + 1, last_hit_at = NOW()
+                WHERE analysis_version = $1 AND fingerprint = $2
+            """, version, fingerprint)
+        except Exception as e:
+            print(f"Contract cache hit count failed: {e}")
+
+contract_cache = ContractAnalysisCache()
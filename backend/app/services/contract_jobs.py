@@ -0,0 +1,137 @@
+from app.config import settings
+from app.services.agent_service import AgentService
+from app.services.document_parser import document_parser
+from app.services.job_queue import job_queue
+from fastapi import UploadFile
+from typing import AsyncIterator, Optional
+import asyncio
+import json
+import os
+import time
+import uuid
+
+# Stages reported on the job row, in order
+STAGES = ("parsed", "analyzing", "analyzed")
+
+class ContractJobService:
+    """
+    Contract analysis as a queued job: the API spools the upload and returns
+    a job id, a worker parses and analyzes it (reporting partial results in
+    the job's progress), and clients poll the job or follow events().
+    """
+
+    def __init__(self):
+        self._agent = None
+
+    async def submit(self, file: UploadFile, session_id: Optional[str] = None) -> str:
+        file_ext = file.filename.split('.')[-1].lower()
+        path = await document_parser.spool_upload(file, os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}.{file_ext}"))
+        return await job_queue.enqueue("contract_analysis", {
+            "path": path,
+            "filename": file.filename,
+            "session_id": session_id
+        }, priority=settings.CONTRACT_JOB_PRIORITY)
+
+    async def run(self, job: dict) -> dict:
+        """Worker side: parse, analyze, save to the session. Returns the analysis."""
+        job_id, payload = job["id"], job["payload"]
+        try:
+            text = await document_parser.parse_path(payload["path"], payload["filename"])
+            await job_queue.set_stage(job_id, "parsed", {"characters": len(text)})
+
+            async def publish(update: dict):
+                await job_queue.set_stage(job_id, "analyzing", update)
+
+            agent = self._get_agent()
+            analysis = await agent.contract_analyzer.analyze_contract(text, on_progress=publish)
+            if analysis.get("error"):
+                # Let the queue retry instead of saving an error as the result
+                raise RuntimeError(analysis["error"])
+
+            if payload.get("session_id"):
+                await agent.save_document_analysis(payload["session_id"], text, analysis)
+            await job_queue.set_stage(job_id, "analyzed")
+        except Exception:
+            if job["attempts"] >= job["max_attempts"]:
+                self._remove_upload(payload["path"])
+            raise
+
+        self._remove_upload(payload["path"])
+        return analysis
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        job = await job_queue.get(job_id)
+        if not job or job["job_type"] != "contract_analysis":
+            return None
+        return self._view(job)
+
+    async def events(self, job_id: str) -> AsyncIterator[dict]:
+        """
+        Yields "status" whenever the job's status or stage changes, "analysis"
+        with the partial result whenever it grows, then "done" with the final
+        analysis or "error". Also ends with "error" if the job hasn't changed
+        for CONTRACT_JOB_EVENTS_IDLE_SECONDS (e.g. no worker is running);
+        the job itself carries on and can be followed again.
+        """
+        last_status, last_analysis = None, None
+        changed_at = time.monotonic()
+        while True:
+            view = await self.get(job_id)
+            if not view:
+                yield {"event": "error", "data": {"detail": "Job not found"}}
+                return
+
+            status = {k: view[k] for k in ("status", "stage", "segments", "error")}
+            if status != last_status:
+                last_status = status
+                changed_at = time.monotonic()
+                yield {"event": "status", "data": status}
+
+            if view["status"] == "succeeded":
+                yield {"event": "done", "data": {"analysis": view["analysis"]}}
+                return
+            if view["status"] == "failed":
+                yield {"event": "error", "data": {"detail": view["error"] or "Analysis failed"}}
+                return
+
+            analysis = json.dumps(view["analysis"], sort_keys=True)
+            if view["analysis"] and analysis != last_analysis:
+                last_analysis = analysis
+                changed_at = time.monotonic()
+                yield {"event": "analysis", "data": {"analysis": view["analysis"]}}
+
+            if time.monotonic() - changed_at > settings.CONTRACT_JOB_EVENTS_IDLE_SECONDS:
+                yield {"event": "error", "data": {"detail": f"No progress in {settings.CONTRACT_JOB_EVENTS_IDLE_SECONDS:.0f}s, job is still {view['status']}"}}
+                return
+
+            await asyncio.sleep(settings.CONTRACT_JOB_EVENTS_POLL_SECONDS)
+
+    def _view(self, job: dict) -> dict:
+        progress = job.get("progress") or {}
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "stage": job.get("stage"),
+            # Final result once succeeded, otherwise whatever sections are ready
+            "analysis": job["result"] if job["status"] == "succeeded" else progress.get("analysis"),
+            "segments": progress.get("segments"),
+            "error": job.get("error"),
+        }
+
+    def _get_agent(self):
+        # Built on first use: only workers run analyses
+        if self._agent is None:
+            self._agent = AgentService()
+        return self._agent
+
+    def _remove_upload(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+contract_job_service = ContractJobService()
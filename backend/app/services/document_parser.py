@@ -1,45 +1,180 @@
 import PyPDF2
 import docx
 from fastapi import UploadFile
-import io
+from app.config import settings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import AsyncIterator, Optional, Tuple
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+SUPPORTED_EXTENSIONS = ('pdf', 'docx', 'txt')
+
+# Lines of plain text are read in blocks of roughly this many bytes
+TEXT_BLOCK_BYTES = 1024 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_parser_pool() -> ProcessPoolExecutor:
+    """Process pool shared by every DocumentParser, created on first use (and after it breaks)."""
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and DB pool is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PARSER_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+def shutdown_parser_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def run_in_parser_pool(fn, *args):
+    """
+    Runs fn in the parser pool. If a parser process died (out of memory, a
+    crash in a PDF library) the pool is broken for good: it is dropped so
+    the next call builds a new one, and fn is retried once on that.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_parser_pool()
+    try:
+        return await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        global _pool
+        # Concurrent calls fail together; only the first replaces the pool
+        if _pool is pool:
+            print("Parser pool broken (a parser process died), restarting it")
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        return await loop.run_in_executor(get_parser_pool(), fn, *args)
 
 class DocumentParser:
+    """
+    Extracts text from uploads without touching the event loop: files are
+    read from disk (uploads are spooled, never held in memory), and the
+    parsing libraries run in a process pool. PDFs are split into page
+    ranges extracted in parallel and yielded in order as they complete.
+    """
+
     async def parse_file(self, file: UploadFile) -> str:
-        content = await file.read()
-        file_ext = file.filename.split('.')[-1].lower()
-        
+        path = await self.spool_upload(file)
+        try:
+            return await self.parse_path(path, file.filename)
+        finally:
+            os.remove(path)
+
+    async def parse_path(self, path: str, filename: str) -> str:
+        return "\n".join([text async for _, text in self.iter_pages(path, filename)])
+
+    async def page_count(self, path: str, filename: str) -> Optional[int]:
+        """Number of pages for PDFs, None for other formats."""
+        if filename.split('.')[-1].lower() != 'pdf':
+            return None
+        return await run_in_parser_pool(_pdf_page_count, path)
+
+    async def iter_pages(self, path: str, filename: str) -> AsyncIterator[Tuple[Optional[int], str]]:
+        """
+        Yields (page_number, text). PDFs yield one entry per page (1-based);
+        other formats yield page_number None.
+        """
+        file_ext = filename.split('.')[-1].lower()
+
         if file_ext == 'pdf':
-            return self._parse_pdf(content)
+            async for page in self._iter_pdf_pages(path):
+                yield page
         elif file_ext == 'docx':
-            return self._parse_docx(content)
+            yield None, await run_in_parser_pool(_extract_docx, path)
         elif file_ext == 'txt':
-            return content.decode('utf-8')
+            with open(path, 'r', encoding='utf-8') as f:
+                while True:
+                    lines = await asyncio.to_thread(f.readlines, TEXT_BLOCK_BYTES)
+                    if not lines:
+                        break
+                    yield None, "".join(lines)
         else:
             raise ValueError(f"Unsupported file type: {file_ext}")
 
-    def _parse_pdf(self, content: bytes) -> str:
-        reader = PyPDF2.PdfReader(io.BytesIO(content))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-
-    def _parse_docx(self, content: bytes) -> str:
-        doc = docx.Document(io.BytesIO(content))
-        text = "\n".join([para.text for para in doc.paragraphs])
-        return text
-
-    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 100) -> list[str]:
-        # Simple sliding window chunking
-        chunks = []
-        start = 0
-        text_len = len(text)
-        
-        while start < text_len:
-            end = min(start + chunk_size, text_len)
-            chunks.append(text[start:end])
-            start += chunk_size - overlap
-            
-        return chunks
+    async def _iter_pdf_pages(self, path: str):
+        page_count = await run_in_parser_pool(_pdf_page_count, path)
+
+        # Bounded read-ahead: enough ranges in flight to keep every process
+        # busy, while the consumer (chunker/embedder) works on earlier pages
+        pages_per_task = settings.PARSER_PAGES_PER_TASK
+        ranges = iter(range(0, page_count, pages_per_task))
+        in_flight = deque()
+
+        def submit():
+            start = next(ranges, None)
+            if start is not None:
+                end = min(start + pages_per_task, page_count)
+                in_flight.append(asyncio.ensure_future(run_in_parser_pool(_extract_pdf_pages, path, start, end)))
+
+        try:
+            for _ in range(settings.PARSER_PROCESSES * 2):
+                submit()
+            while in_flight:
+                pages = await in_flight.popleft()
+                submit()
+                for page in pages:
+                    yield page
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def spool_upload(self, file: UploadFile, path: Optional[str] = None) -> str:
+        """
+        Copies an upload to disk in 1 MB blocks, off the event loop.
+        Without a path, a temporary file in UPLOAD_DIR is used.
+        """
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        if path is None:
+            suffix = "." + file.filename.split('.')[-1].lower()
+            fd, path = tempfile.mkstemp(suffix=suffix, dir=settings.UPLOAD_DIR)
+            os.close(fd)
+
+        def copy():
+            with open(path, "wb") as out:
+                shutil.copyfileobj(file.file, out, 1024 * 1024)
+
+        await asyncio.to_thread(copy)
+        return path
+
+# Process pool entry points (module level so they can be pickled)
+
+_open_reader = (None, None, None)
+
+def _pdf_reader(path: str) -> PyPDF2.PdfReader:
+    # Each process keeps its last reader open so consecutive page ranges of
+    # the same file don't re-read the cross-reference table. The reader gets
+    # a file handle, not the path: given a path PyPDF2 loads the whole file.
+    global _open_reader
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    open_key, handle, reader = _open_reader
+    if open_key != key:
+        if handle:
+            handle.close()
+        handle = open(path, 'rb')
+        reader = PyPDF2.PdfReader(handle)
+        _open_reader = (key, handle, reader)
+    return reader
+
+def _pdf_page_count(path: str) -> int:
+    return len(_pdf_reader(path).pages)
+
+def _extract_pdf_pages(path: str, start: int, end: int) -> list:
+    reader = _pdf_reader(path)
+    return [(number + 1, reader.pages[number].extract_text() or "") for number in range(start, end)]
+
+def _extract_docx(path: str) -> str:
+    doc = docx.Document(path)
+    return "\n".join([para.text for para in doc.paragraphs])
 
 document_parser = DocumentParser()
@@ -0,0 +1,80 @@
+from app.config import settings
+from app.models.database import db
+from collections import OrderedDict
+from typing import Dict, List
+import hashlib
+import numpy as np
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by (model, sha256 of whitespace-normalized text).
+    An in-process LRU sits in front of the embedding_cache table, so embeddings
+    survive restarts and are shared between workers.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        persistent: bool = settings.EMBEDDING_CACHE_PERSISTENT
+    ):
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._lru: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    async def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        for h in hashes:
+            vector = self._lru.get((model, h))
+            if vector is not None:
+                self._lru.move_to_end((model, h))
+                found[h] = vector
+
+        missing = [h for h in set(hashes) if h not in found]
+        if missing and self.persistent:
+            try:
+                rows = await db.fetch(
+                    "SELECT text_hash, embedding FROM embedding_cache WHERE model = $1 AND text_hash = ANY($2::text[])",
+                    model, missing
+                )
+            except Exception as e:
+                print(f"Embedding cache lookup failed: {e}")
+                rows = []
+            for row in rows:
+                self._remember(model, row["text_hash"], row["embedding"])
+                found[row["text_hash"]] = row["embedding"]
+
+        return found
+
+    async def put_many(self, model: str, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+
+        for h, embedding in items.items():
+            self._remember(model, h, embedding)
+
+        if self.persistent:
+            try:
+                pool = await db.get_db()
+                await pool.executemany(
+                    """
+                    INSERT INTO embedding_cache (model, text_hash, embedding)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (model, text_hash) DO NOTHING
+                    """,
+                    [(model, h, e) for h, e in items.items()]
+                )
+            except Exception as e:
+                print(f"Embedding cache write failed: {e}")
+
+    def _remember(self, model: str, text_hash: str, embedding: np.ndarray):
+        self._lru[(model, text_hash)] = embedding
+        self._lru.move_to_end((model, text_hash))
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+embedding_cache = EmbeddingCache()
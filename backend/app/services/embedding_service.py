@@ -1,34 +1,100 @@
-from openai import AsyncOpenAI
 from app.config import settings
+from app.services.embedding_cache import embedding_cache
+from app.services.llm_gateway import llm_gateway
+from app.utils.tokens import count_tokens, truncate_tokens
 from typing import List
+import asyncio
+import numpy as np
+
+# Per-input limit of the embedding endpoint
+MAX_INPUT_TOKENS = 8191
 
 class EmbeddingService:
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = "text-embedding-3-small"
-    
-    async def create_embedding(self, text: str) -> List[float]:
-        text = text.replace("\n", " ")
-        response = await self.client.embeddings.create(
-            model=self.model,
-            input=text
-        )
-        return response.data[0].embedding
-    
-    async def batch_embed(self, texts: List[str]) -> List[List[float]]:
-        # OpenAI has a limit on input size, so we might need to batch this further
-        # inside here if lists are huge. For now, simple pass-through.
+        self.model = settings.EMBEDDING_MODEL
+        self.cache = embedding_cache
+        self.max_batch_items = settings.EMBEDDING_BATCH_MAX_ITEMS
+        self.max_batch_tokens = settings.EMBEDDING_BATCH_MAX_TOKENS
+        self._semaphore = asyncio.Semaphore(settings.EMBEDDING_MAX_CONCURRENCY)
+
+    async def create_embedding(self, text: str) -> np.ndarray:
+        # Query embeddings: someone is waiting on the answer
+        embeddings = await self._embed_with_cache([text], "interactive")
+        return embeddings[0]
+
+    async def batch_embed(self, texts: List[str], priority: str = "batch") -> List[np.ndarray]:
         if not texts:
             return []
-            
+        return await self._embed_with_cache(texts, priority)
+
+    async def _embed_with_cache(self, texts: List[str], priority: str) -> List[np.ndarray]:
+        """
+        Looks every text up in the embedding cache and only sends the misses
+        (deduplicated) to the API. Results are returned in input order.
+        """
         # Clean newlines for better embeddings
         cleaned_texts = [t.replace("\n", " ") for t in texts]
-        
-        response = await self.client.embeddings.create(
-            model=self.model,
-            input=cleaned_texts
-        )
+        hashes = [self.cache.text_hash(t) for t in cleaned_texts]
+
+        found = await self.cache.get_many(self.model, hashes)
+
+        misses = {}
+        for h, text in zip(hashes, cleaned_texts):
+            if h not in found and h not in misses:
+                misses[h] = text
+
+        if misses:
+            embeddings = await self._request_embeddings(list(misses.values()), priority)
+            fresh = dict(zip(misses.keys(), embeddings))
+            await self.cache.put_many(self.model, fresh)
+            found.update(fresh)
+
+        return [found[h] for h in hashes]
+
+    async def _request_embeddings(self, texts: List[str], priority: str) -> List[np.ndarray]:
+        """
+        Splits texts into sub-batches bounded by item count and token budget,
+        sends them with bounded concurrency and reassembles results in order.
+        """
+        results: List[np.ndarray] = [None] * len(texts)
+
+        async def run(batch: List[tuple[int, str]], tokens: int):
+            async with self._semaphore:
+                embeddings = await self._embed_batch([text for _, text in batch], priority, tokens)
+            for (i, _), embedding in zip(batch, embeddings):
+                results[i] = embedding
+
+        await asyncio.gather(*(run(batch, tokens) for batch, tokens in self._plan_batches(texts)))
+        return results
+
+    def _plan_batches(self, texts: List[str]) -> List[tuple[List[tuple[int, str]], int]]:
+        """Sub-batches of (index, text), each with its token count."""
+        batches = []
+        current = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            tokens = count_tokens(text, self.model)
+            if tokens > MAX_INPUT_TOKENS:
+                text = truncate_tokens(text, MAX_INPUT_TOKENS, self.model)
+                tokens = MAX_INPUT_TOKENS
+
+            if current and (len(current) >= self.max_batch_items or current_tokens + tokens > self.max_batch_tokens):
+                batches.append((current, current_tokens))
+                current = []
+                current_tokens = 0
+
+            current.append((i, text))
+            current_tokens += tokens
+
+        if current:
+            batches.append((current, current_tokens))
+        return batches
+
+    async def _embed_batch(self, texts: List[str], priority: str, tokens: int) -> List[np.ndarray]:
+        """One embeddings request through the LLM gateway (which handles retries)."""
+        response = await llm_gateway.embed(texts, self.model, priority, tokens)
         # Sort by index to ensure order matches input
-        return [data.embedding for data in response.data]
+        return [np.asarray(data.embedding, dtype=np.float32) for data in sorted(response.data, key=lambda d: d.index)]
 
 embedding_service = EmbeddingService()
@@ -0,0 +1,130 @@
+from app.models.database import db
+from app.services.document_parser import document_parser
+from app.services.chunker import chunker
+from app.services.embedding_service import embedding_service
+from app.services.chunk_writer import chunk_hash, chunk_writer
+from app.services.job_queue import job_queue
+from app.services.news_scraper import NewsScraperService
+import asyncio
+import os
+
+# Chunks per embedding request sent while the document is still being parsed
+EMBED_PIPELINE_BATCH = 64
+# Parse progress is reported on the job every this many pages (or text blocks)
+PROGRESS_EVERY_PAGES = 20
+
+class IngestionService:
+    """
+    Executes ingestion jobs claimed from the job queue, reporting each
+    stage (parsed / chunked / embedded / indexed) as it completes, and
+    "parsing" with page and chunk counts while a document is being read.
+    """
+
+    def __init__(self):
+        self.news_scraper = NewsScraperService()
+
+    async def run_job(self, job: dict) -> dict:
+        if job["job_type"] == "document":
+            try:
+                return await self.ingest_document(job["id"], job["payload"])
+            except Exception:
+                # Won't be retried: don't leave the spooled upload behind
+                if job["attempts"] >= job["max_attempts"]:
+                    self._remove_upload(job["payload"]["path"])
+                raise
+        if job["job_type"] == "news":
+            return await self.ingest_news(job["id"], job["payload"])
+        raise ValueError(f"Unknown job type: {job['job_type']}")
+
+    async def ingest_document(self, job_id: str, payload: dict) -> dict:
+        doc_id = payload["document_id"]
+        document_key = payload.get("document_key")
+
+        if document_key:
+            # Re-ingestion: update the document already stored under this key
+            existing_id = await db.fetch_val("SELECT id FROM documents WHERE document_key = $1", document_key)
+            if existing_id:
+                doc_id = str(existing_id)
+        elif await db.fetch_val("SELECT id FROM documents WHERE id = $1", doc_id):
+            # A previous attempt may have committed the document and died before
+            # reporting success; the write is atomic, so it is complete
+            await job_queue.set_stage(job_id, "indexed")
+            self._remove_upload(payload["path"])
+            return {"document_id": doc_id}
+
+        # Chunks whose text is already stored keep their embedding
+        stored_hashes = await chunk_writer.fetch_chunk_hashes(doc_id)
+
+        # 1-3. Parse, chunk and embed as a pipeline: pages come out of the
+        # parser's process pool in order, are chunked as they arrive, and
+        # full embedding batches are sent while later pages are still parsing
+        stream = chunker.stream()
+        page_texts, chunks, pending, embedding_tasks = [], [], {}, []
+
+        def queue_embeddings(completed: list):
+            for chunk in completed:
+                h = chunk_hash(chunk["text"])
+                if h not in stored_hashes:
+                    pending[h] = chunk["text"]
+                    stored_hashes.add(h)
+            chunks.extend(completed)
+
+        def send_pending():
+            hashes, texts = list(pending), list(pending.values())
+            async def embed():
+                return dict(zip(hashes, await embedding_service.batch_embed(texts)))
+            embedding_tasks.append(asyncio.create_task(embed()))
+            pending.clear()
+
+        try:
+            page_count = await document_parser.page_count(payload["path"], payload["filename"])
+            await job_queue.set_stage(job_id, "parsing", {"pages": 0, "page_count": page_count, "chunks": 0})
+
+            async for page, page_text in document_parser.iter_pages(payload["path"], payload["filename"]):
+                page_texts.append(page_text)
+                # Tokenizing is CPU-bound too
+                queue_embeddings(await asyncio.to_thread(list, stream.feed(page_text, page)))
+                if len(pending) >= EMBED_PIPELINE_BATCH:
+                    send_pending()
+                if len(page_texts) % PROGRESS_EVERY_PAGES == 0:
+                    await job_queue.set_stage(job_id, "parsing", {"pages": len(page_texts), "chunks": len(chunks)})
+
+            queue_embeddings(list(stream.finish()))
+            if pending:
+                send_pending()
+
+            text = "\n".join(page_texts)
+            await job_queue.set_stage(job_id, "parsed", {"characters": len(text), "pages": len(page_texts)})
+            await job_queue.set_stage(job_id, "chunked", {"chunks": len(chunks)})
+
+            embeddings = {}
+            for batch in await asyncio.gather(*embedding_tasks):
+                embeddings.update(batch)
+            await job_queue.set_stage(job_id, "embedded", {"embedded": len(embeddings)})
+        except BaseException:
+            for task in embedding_tasks:
+                task.cancel()
+            raise
+
+        # 4. Index document and chunks together (only changed chunks are written)
+        changes = await chunk_writer.sync_document(
+            doc_id, payload["title"], text, payload["document_type"], payload.get("source_url"), {},
+            [c["text"] for c in chunks], embeddings, [c["metadata"] for c in chunks], document_key
+        )
+        await job_queue.set_stage(job_id, "indexed", changes)
+
+        self._remove_upload(payload["path"])
+        return {"document_id": doc_id, **changes}
+
+    async def ingest_news(self, job_id: str, payload: dict) -> dict:
+        result = await self.news_scraper.scrape_and_index_news(payload["query"], payload["limit"])
+        await job_queue.set_stage(job_id, "indexed", {"indexed": result.get("indexed", 0)})
+        return result
+
+    def _remove_upload(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+ingestion_service = IngestionService()
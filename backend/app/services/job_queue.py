@@ -0,0 +1,141 @@
+from app.config import settings
+from app.models.database import db
+from typing import Optional
+import json
+import os
+import uuid
+
+# Ingestion stages, in order, reported on ingestion_jobs.stage. Before
+# "parsed", document jobs report "parsing" with progress pages/page_count.
+STAGES = ("parsed", "chunked", "embedded", "indexed")
+
+class JobQueue:
+    """
+    Postgres-backed job queue for ingestion work. Workers claim jobs with
+    FOR UPDATE SKIP LOCKED, so any number of them can poll the same table.
+    A running job whose lock has not been refreshed within
+    JOB_LOCK_TIMEOUT_SECONDS is treated as abandoned (crashed worker) and
+    becomes claimable again, unless it has used up max_attempts: a job
+    that keeps killing its worker (e.g. a document that runs the parser out
+    of memory) is marked failed instead. Higher priority jobs (someone
+    waiting on the result) are claimed before older, lower priority ones.
+    """
+
+    async def enqueue(self, job_type: str, payload: dict, max_attempts: int = settings.JOB_MAX_ATTEMPTS, priority: int = 0) -> str:
+        job_id = str(uuid.uuid4())
+        await db.execute(
+            "INSERT INTO ingestion_jobs (id, job_type, payload, max_attempts, priority) VALUES ($1, $2, $3, $4, $5)",
+            job_id, job_type, json.dumps(payload), max_attempts, priority
+        )
+        return job_id
+
+    async def claim(self, worker_id: str) -> Optional[dict]:
+        await self._fail_abandoned()
+        row = await db.fetch_row(
+            """
+            UPDATE ingestion_jobs
+            SET status = 'running', attempts = attempts + 1, locked_by = $1,
+                locked_at = NOW(), updated_at = NOW(), error = NULL
+            WHERE id = (
+                SELECT id FROM ingestion_jobs
+                WHERE (status = 'queued' AND run_after <= NOW())
+                   OR (status = 'running' AND locked_at < NOW() - make_interval(secs => $2)
+                       AND attempts < max_attempts)
+                ORDER BY priority DESC, created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING *
+            """,
+            worker_id, settings.JOB_LOCK_TIMEOUT_SECONDS
+        )
+        return self._to_dict(row) if row else None
+
+    async def _fail_abandoned(self):
+        """Fails abandoned jobs that were on their last attempt and removes their spooled uploads."""
+        rows = await db.fetch(
+            """
+            UPDATE ingestion_jobs
+            SET status = 'failed', error = 'Worker stopped responding on the last attempt',
+                locked_by = NULL, locked_at = NULL, updated_at = NOW()
+            WHERE status = 'running' AND locked_at < NOW() - make_interval(secs => $1)
+              AND attempts >= max_attempts
+            RETURNING id, payload
+            """,
+            settings.JOB_LOCK_TIMEOUT_SECONDS
+        )
+        for row in rows:
+            job = self._to_dict(row)
+            print(f"Job {job['id']} abandoned after its last attempt, marked failed")
+            path = job["payload"].get("path")
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    async def heartbeat(self, job_id: str):
+        await db.execute("UPDATE ingestion_jobs SET locked_at = NOW() WHERE id = $1 AND status = 'running'", job_id)
+
+    async def set_stage(self, job_id: str, stage: str, progress: dict = None):
+        await db.execute(
+            """
+            UPDATE ingestion_jobs
+            SET stage = $2, progress = progress || $3::jsonb, locked_at = NOW(), updated_at = NOW()
+            WHERE id = $1
+            """,
+            job_id, stage, json.dumps(progress or {})
+        )
+
+    async def complete(self, job_id: str, result: dict = None):
+        await db.execute(
+            """
+            UPDATE ingestion_jobs
+            SET status = 'succeeded', result = $2, locked_by = NULL, locked_at = NULL, updated_at = NOW()
+            WHERE id = $1
+            """,
+            job_id, json.dumps(result or {})
+        )
+
+    async def fail(self, job_id: str, error: str):
+        """
+        Re-queues the job with exponential backoff, or marks it failed once
+        it has used up max_attempts.
+        """
+        await db.execute(
+            """
+            UPDATE ingestion_jobs
+            SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                run_after = NOW() + make_interval(secs => power(2, attempts) * $3),
+                error = $2, locked_by = NULL, locked_at = NULL, updated_at = NOW()
+            WHERE id = $1
+            """,
+            job_id, error, settings.JOB_RETRY_BACKOFF_SECONDS
+        )
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        row = await db.fetch_row("SELECT * FROM ingestion_jobs WHERE id = $1", job_id)
+        return self._to_dict(row) if row else None
+
+    async def list_jobs(self, limit: int = 20, status: str = None) -> list:
+        rows = await db.fetch(
+            """
+            SELECT * FROM ingestion_jobs
+            WHERE ($2::varchar IS NULL OR status = $2)
+            ORDER BY created_at DESC
+            LIMIT $1
+            """,
+            limit, status
+        )
+        return [self._to_dict(r) for r in rows]
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        job = dict(row)
+        job["id"] = str(job["id"])
+        for key in ("payload", "progress", "result"):
+            if isinstance(job.get(key), str):
+                job[key] = json.loads(job[key])
+        return job
+
+job_queue = JobQueue()
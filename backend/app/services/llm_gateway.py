@@ -0,0 +1,253 @@
+from app.config import settings
+from app.utils.tokens import count_tokens
+from bisect import insort
+from itertools import count
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
+from typing import List, Optional
+import asyncio
+import httpx
+import random
+import time
+
+# Priority classes, most urgent first
+INTERACTIVE = 0  # someone is waiting: chat answers, query embeddings, search decisions
+ANALYSIS = 1     # contract analysis
+BATCH = 2        # ingestion, news scraping, summaries, shadow decisions
+PRIORITIES = {"interactive": INTERACTIVE, "analysis": ANALYSIS, "batch": BATCH}
+# Chat format overhead per message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+class PriorityLimiter:
+    """
+    Concurrency limit shared by all requests. Free slots go to the most
+    urgent waiter first, and batch requests never hold more than
+    batch_limit slots, so a bulk job leaves room for chat.
+    """
+
+    def __init__(self, limit: int, batch_limit: int):
+        self.limit = limit
+        self.class_limits = {BATCH: batch_limit}
+        self.active = 0
+        self.active_by_priority = {INTERACTIVE: 0, ANALYSIS: 0, BATCH: 0}
+        self._waiters = []
+        self._seq = count()
+
+    async def acquire(self, priority: int):
+        if self._has_room(priority) and not any(w[0] <= priority for w in self._waiters):
+            self._take(priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future]
+        insort(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: pass the slot on
+                self.release(priority)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+            raise
+
+    def release(self, priority: int):
+        self.active -= 1
+        self.active_by_priority[priority] -= 1
+        self._wake()
+
+    def _wake(self):
+        for entry in list(self._waiters):
+            if self.active >= self.limit:
+                break
+            priority, _, future = entry
+            if future.done():
+                self._waiters.remove(entry)
+                continue
+            if not self._has_room(priority):
+                continue
+            self._waiters.remove(entry)
+            self._take(priority)
+            future.set_result(None)
+
+    def _has_room(self, priority: int) -> bool:
+        class_limit = self.class_limits.get(priority)
+        return self.active < self.limit and (class_limit is None or self.active_by_priority[priority] < class_limit)
+
+    def _take(self, priority: int):
+        self.active += 1
+        self.active_by_priority[priority] += 1
+
+class TokenGovernor:
+    """
+    Token bucket over LLM_TOKENS_PER_MINUTE. Requests take their estimated
+    tokens up front (corrected from the reported usage afterwards); only
+    interactive requests may dip into the last reserve share of the bucket.
+    """
+
+    def __init__(self, tokens_per_minute: int, interactive_reserve: float):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.reserve = tokens_per_minute * interactive_reserve
+        self.available = float(tokens_per_minute)
+        self._updated = time.monotonic()
+
+    async def acquire(self, tokens: int, priority: int):
+        floor = 0.0 if priority == INTERACTIVE else self.reserve
+        # A request bigger than the bucket would never fit; let it through when it's full
+        tokens = min(tokens, self.capacity - floor)
+        while True:
+            self._refill()
+            if self.available - tokens >= floor:
+                self.available -= tokens
+                return
+            await asyncio.sleep(min((tokens + floor - self.available) / self.rate, 1.0))
+
+    def adjust(self, delta: int):
+        """Charges (or refunds, if negative) tokens after the fact."""
+        self._refill()
+        self.available = min(self.available - delta, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.available + (now - self._updated) * self.rate, self.capacity)
+        self._updated = now
+
+class LLMGateway:
+    """
+    The one OpenAI client of the process, for chat completions and
+    embeddings alike, pointed at LLM_BASE_URL when set (e.g. a local stub).
+
+    Every request goes through, in order: the token governor, the priority
+    limiter, then the API call with per-endpoint timeouts, retried with
+    exponential backoff and jitter on 429s, 5xx and connection errors.
+    Interactive non-streaming calls can be hedged: if no answer arrives
+    within LLM_HEDGE_AFTER_SECONDS a duplicate is sent and the first
+    response wins.
+
+    Limits are per process; with several API or worker processes, size
+    LLM_TOKENS_PER_MINUTE as each one's share of the account limit.
+    """
+
+    def __init__(self):
+        self.client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.LLM_BASE_URL,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.CHAT_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS
+                )
+            )
+        )
+        self.limiter = PriorityLimiter(settings.LLM_MAX_CONCURRENCY, settings.LLM_BATCH_MAX_CONCURRENCY)
+        self.governor = TokenGovernor(settings.LLM_TOKENS_PER_MINUTE, settings.LLM_INTERACTIVE_TPM_RESERVE) if settings.LLM_TOKENS_PER_MINUTE else None
+
+    async def chat(self, priority: str, timeout: float, **params):
+        """
+        chat.completions.create(**params). With stream=True the stream is
+        returned once it starts; it holds a concurrency slot only until then.
+        """
+        level = PRIORITIES[priority]
+        estimate = self._estimate_chat(params)
+
+        async def call():
+            return await self.client.chat.completions.create(timeout=self._timeout(timeout), **params)
+
+        if level == INTERACTIVE and settings.LLM_HEDGE_AFTER_SECONDS and not params.get("stream"):
+            return await self._hedged(lambda: self._send(call, level, estimate))
+        return await self._send(call, level, estimate)
+
+    async def embed(self, texts: List[str], model: str, priority: str = "batch", tokens: Optional[int] = None):
+        level = PRIORITIES[priority]
+        estimate = tokens if tokens is not None else sum(count_tokens(t, model) for t in texts)
+
+        async def call():
+            return await self.client.embeddings.create(model=model, input=texts, timeout=self._timeout(settings.EMBEDDING_TIMEOUT_SECONDS))
+
+        if level == INTERACTIVE and settings.LLM_HEDGE_AFTER_SECONDS:
+            return await self._hedged(lambda: self._send(call, level, estimate))
+        return await self._send(call, level, estimate)
+
+    async def close(self):
+        await self.client.close()
+
+    async def _send(self, call, level: int, estimate: int):
+        max_retries = settings.LLM_INTERACTIVE_MAX_RETRIES if level == INTERACTIVE else settings.LLM_MAX_RETRIES
+        # Someone is waiting on interactive calls: keep their backoff short
+        max_delay = 2.0 if level == INTERACTIVE else 30.0
+        attempt = 0
+        while True:
+            if self.governor:
+                await self.governor.acquire(estimate, level)
+            try:
+                await self.limiter.acquire(level)
+                try:
+                    response = await call()
+                    error = None
+                except (APIStatusError, APIConnectionError) as e:
+                    error = e
+                finally:
+                    self.limiter.release(level)
+            except asyncio.CancelledError:
+                # e.g. the losing half of a hedge: it used no tokens we know of
+                if self.governor:
+                    self.governor.adjust(-estimate)
+                raise
+
+            if error is None:
+                usage = getattr(response, "usage", None)
+                if self.governor and usage is not None and getattr(usage, "total_tokens", None):
+                    self.governor.adjust(usage.total_tokens - estimate)
+                return response
+
+            if self.governor:
+                self.governor.adjust(-estimate)
+            status = getattr(error, "status_code", None)
+            retryable = status is None or status in (408, 409, 429) or status >= 500
+            if not retryable or attempt >= max_retries:
+                raise error
+
+            delay = min(2 ** attempt, max_delay) + random.uniform(0, 1)
+            retry_after = error.response.headers.get("retry-after") if isinstance(error, APIStatusError) else None
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+
+            attempt += 1
+            print(f"LLM request failed ({status or error.__class__.__name__}), retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _hedged(self, send):
+        first = asyncio.create_task(send())
+        done, _ = await asyncio.wait({first}, timeout=settings.LLM_HEDGE_AFTER_SECONDS)
+        if done:
+            return first.result()
+
+        second = asyncio.create_task(send())
+        try:
+            pending = {first, second}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Both can finish in the same round: any success wins
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    raise done.pop().exception()
+        finally:
+            for task in (first, second):
+                task.cancel()
+
+    def _estimate_chat(self, params: dict) -> int:
+        prompt = sum(count_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in params.get("messages", []))
+        return prompt + (params.get("max_tokens") or settings.LLM_DEFAULT_COMPLETION_TOKENS)
+
+    @staticmethod
+    def _timeout(seconds: float) -> httpx.Timeout:
+        return httpx.Timeout(seconds, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,88 @@
+from app.config import settings
+from app.services.llm_gateway import llm_gateway
+from app.utils.tokens import count_tokens
+from typing import List, Optional
+
+# Stage -> (model setting, temperature, max_tokens setting, timeout setting,
+# gateway priority). Settings are read on every route() so they can be
+# changed per environment without touching the services.
+STAGES = {
+    "chat": ("CHAT_MODEL", 0.3, "CHAT_MAX_TOKENS", "CHAT_TIMEOUT_SECONDS", "interactive"),
+    "chat_simple": ("CHAT_SIMPLE_MODEL", 0.3, "CHAT_MAX_TOKENS", "CHAT_SIMPLE_TIMEOUT_SECONDS", "interactive"),
+    "contract_analysis": ("CONTRACT_ANALYSIS_MODEL", 0.2, "CONTRACT_ANALYSIS_MAX_TOKENS", "CONTRACT_ANALYSIS_TIMEOUT_SECONDS", "analysis"),
+    "search_decision": ("SEARCH_DECISION_MODEL", 0.0, "SEARCH_DECISION_MAX_TOKENS", "SEARCH_DECISION_TIMEOUT_SECONDS", "interactive"),
+    "search_reference": ("SEARCH_DECISION_SHADOW_MODEL", 0.0, "SEARCH_DECISION_MAX_TOKENS", "SEARCH_DECISION_TIMEOUT_SECONDS", "batch"),
+    "summarization": ("SESSION_SUMMARY_MODEL", 0.0, "SESSION_SUMMARY_MAX_TOKENS", "SESSION_SUMMARY_TIMEOUT_SECONDS", "batch"),
+}
+# Stage a cheaper route falls back to when its answer isn't usable
+ESCALATIONS = {
+    "chat_simple": "chat",
+}
+
+class ModelRouter:
+    """
+    Picks the model and request limits for each LLM stage from Settings and
+    sends the completion through the shared LLM gateway, at the stage's
+    priority.
+
+    Chat is routed per question: a short single question in a simple
+    category, answered from a strong retrieval match without web results,
+    goes to CHAT_SIMPLE_MODEL; anything else to CHAT_MODEL. A simple route
+    whose completion fails or is cut off is escalated (see escalate()).
+    """
+
+    def route(self, stage: str, reason: str = None) -> dict:
+        """Returns {"stage", "model", "temperature", "max_tokens", "timeout", "priority", "reason"}."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown model stage: {stage}")
+        model_setting, temperature, max_tokens_setting, timeout_setting, priority = STAGES[stage]
+        return {
+            "stage": stage,
+            "model": getattr(settings, model_setting),
+            "temperature": temperature,
+            "max_tokens": getattr(settings, max_tokens_setting),
+            "timeout": getattr(settings, timeout_setting),
+            "priority": priority,
+            "reason": reason,
+        }
+
+    def route_chat(self, question: str, category: str, chunks: List[dict], web_results: List[dict]) -> dict:
+        reason = self._complexity(question, category, chunks, web_results)
+        if reason:
+            return self.route("chat", reason)
+        return self.route("chat_simple", "simple")
+
+    def escalate(self, route: dict, reason: str) -> Optional[dict]:
+        """The next stage up from route, or None if there is none."""
+        stage = ESCALATIONS.get(route["stage"])
+        if not stage:
+            return None
+        print(f"Escalating {route['stage']} ({route['model']}) to {stage}: {reason}")
+        return self.route(stage, f"escalated: {reason}")
+
+    async def complete(self, route: dict, messages: List[dict], **kwargs):
+        """chat.completions.create with the route's model and limits; kwargs are passed through."""
+        params = {"temperature": route["temperature"]}
+        if route["max_tokens"]:
+            params["max_tokens"] = route["max_tokens"]
+        params.update(kwargs)
+        return await llm_gateway.chat(route["priority"], route["timeout"], model=route["model"], messages=messages, **params)
+
+    def _complexity(self, question: str, category: str, chunks: List[dict], web_results: List[dict]) -> Optional[str]:
+        """Why the question needs the full chat model, or None if it doesn't."""
+        if not settings.CHAT_SIMPLE_ENABLED:
+            return "routing disabled"
+        if category not in settings.CHAT_SIMPLE_CATEGORIES:
+            return f"category {category}"
+        if web_results:
+            return "web results"
+        if question.count("?") > 1:
+            return "several questions"
+        if count_tokens(question) > settings.CHAT_SIMPLE_MAX_QUESTION_TOKENS:
+            return "long question"
+        best = max((c.get("similarity") or 0.0 for c in chunks), default=0.0)
+        if best < settings.CHAT_SIMPLE_MIN_RETRIEVAL_SCORE:
+            return "weak retrieval"
+        return None
+
+model_router = ModelRouter()
@@ -1,77 +1,135 @@
 import asyncio
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
 from newspaper import Article
-from app.services.web_search_service import WebSearchService
-from app.services.embedding_service import EmbeddingService
+from app.config import settings
+from app.services.web_search_service import web_search_service
+from app.services.embedding_service import embedding_service
 from app.services.rag_service import RAGService
+from app.services.chunk_writer import chunk_writer
+from app.services.chunker import chunker
 from app.models.database import db
 import uuid
 
 class NewsScraperService:
     def __init__(self):
-        self.web_search = WebSearchService()
-        self.embedding = EmbeddingService()
+        self.web_search = web_search_service
+        self.embedding = embedding_service
         self.rag = RAGService()
+        self.max_concurrency = settings.NEWS_SCRAPE_CONCURRENCY
+        self.per_domain_concurrency = settings.NEWS_PER_DOMAIN_CONCURRENCY
+        self.per_domain_delay = settings.NEWS_PER_DOMAIN_DELAY_SECONDS
 
     async def scrape_and_index_news(self, query: str = "Kenya labor rights strikes unions news", limit: int = 5):
         """
         Searches for news, scrapes content, and indexes it if relevant.
+
+        Pipeline: one dedupe query for all candidate URLs, parallel downloads
+        (bounded overall and per domain), one batched embedding call for the
+        chunks of every article, and one bulk write that skips articles
+        already stored under the same document key.
         """
         print(f"Starting news scrape for: {query}")
-        
+
         # 1. Search for recent articles
         results = await self.web_search.search(query, max_results=limit)
-        
-        indexed_count = 0
+
+        # 2. Drop articles we already have, in a single query
+        candidates = {}
         for result in results:
-            url = result['url']
-            title = result['title']
-            
-            # Check if already indexed
-            existing = await db.fetch_val("SELECT id FROM documents WHERE source_url = $1", url)
-            if existing:
-                print(f"Skipping existing article: {title}")
-                continue
-
-            try:
-                # 2. Scrape full content using newspaper3k
-                # Note: synchronous library, run in thread
-                article_text = await asyncio.to_thread(self._scrape_article_content, url)
-                
-                if not article_text or len(article_text) < 200:
-                    print(f"Skipping thin content: {title}")
-                    continue
-
-                # 3. Save to Documents
-                doc_id = str(uuid.uuid4())
-                await db.execute(
-                    "INSERT INTO documents (id, title, content, document_type, source_url, metadata) VALUES ($1, $2, $3, $4, $5, $6)",
-                    doc_id, title, article_text, "News", url, '{"source": "scraper"}'
-                )
-
-                # 4. Chunk and Embed (using existing RAG service logic or manual)
-                # We'll re-use the document ingestion pipeline logic here ideally, 
-                # but for now let's manually call the services to keep it contained.
-                
-                # Split into chunks (simple split for now)
-                words = article_text.split()
-                chunk_size = 300
-                chunks = [' '.join(words[i:i+chunk_size]) for i in range(0, len(words), chunk_size)]
-                
-                for i, chunk_text in enumerate(chunks):
-                    emb = await self.embedding.create_embedding(chunk_text)
-                    chunk_id = str(uuid.uuid4())
-                    await db.execute(
-                        "INSERT INTO document_chunks (id, document_id, chunk_text, chunk_index, embedding) VALUES ($1, $2, $3, $4, $5)",
-                        chunk_id, doc_id, chunk_text, i, str(emb)
-                    )
-                
-                indexed_count += 1
-                print(f"Indexed: {title}")
-
-            except Exception as e:
-                print(f"Failed to process {url}: {e}")
-
-        return {"status": "success", "indexed": indexed_count}
+            if result.get('url') and result['url'] not in candidates:
+                candidates[result['url']] = result
+
+        if candidates:
+            # Uploads are keyed by their source URL too, so check both
+            rows = await db.fetch("""
+                SELECT source_url, document_key FROM documents
+                WHERE source_url = ANY($1::text[]) OR document_key = ANY($1::text[])
+            """, list(candidates))
+            for row in rows:
+                for url in (row['source_url'], row['document_key']):
+                    skipped = candidates.pop(url, None)
+                    if skipped:
+                        print(f"Skipping existing article: {skipped['title']}")
+
+        # 3. Download and parse in parallel
+        articles = await self._download_all(list(candidates.values()))
+
+        # 4. Chunk every article, then embed all chunks in one batched call
+        documents = []
+        for result, article_text in articles:
+            chunks = list(chunker.iter_chunks(article_text))
+            documents.append({
+                "id": str(uuid.uuid4()),
+                "title": result['title'],
+                "content": article_text,
+                "document_type": "News",
+                "source_url": result['url'],
+                "document_key": result['url'],
+                "metadata": {"source": "scraper"},
+                "chunks": [c["text"] for c in chunks],
+                "chunk_metadata": [c["metadata"] for c in chunks]
+            })
+
+        all_chunks = [chunk for doc in documents for chunk in doc["chunks"]]
+        embeddings = await self.embedding.batch_embed(all_chunks)
+
+        offset = 0
+        for doc in documents:
+            doc["embeddings"] = embeddings[offset:offset + len(doc["chunks"])]
+            offset += len(doc["chunks"])
+
+        # 5. Save documents and chunks in one transaction; articles another
+        # writer stored in the meantime are skipped, not fatal to the batch
+        written = set(await chunk_writer.write_documents(documents))
+        for doc in documents:
+            if doc["id"] in written:
+                print(f"Indexed: {doc['title']}")
+            else:
+                print(f"Skipping existing article: {doc['title']}")
+
+        return {"status": "success", "indexed": len(written)}
+
+    async def _download_all(self, results: list) -> list:
+        """
+        Scrapes articles concurrently, at most max_concurrency at once and
+        per_domain_concurrency per host, with a minimum gap between requests
+        to the same host. Returns (result, text) for usable articles.
+        """
+        overall = asyncio.Semaphore(self.max_concurrency)
+        domain_locks = defaultdict(lambda: asyncio.Semaphore(self.per_domain_concurrency))
+        last_request = {}
+
+        async def fetch(result):
+            domain = urlparse(result['url']).netloc
+            # Domain first: tasks queued behind a busy host must not hold global slots
+            async with domain_locks[domain]:
+                # Reserve the next request time before sleeping, so concurrent
+                # tasks for the same host are spaced out rather than sharing a slot
+                now = time.monotonic()
+                slot = max(now, last_request.get(domain, 0) + self.per_domain_delay)
+                last_request[domain] = slot
+                await asyncio.sleep(slot - now)
+
+                async with overall:
+                    # Note: synchronous library, run in thread
+                    article_text = await asyncio.to_thread(self._scrape_article_content, result['url'])
+
+            if not article_text or len(article_text) < 200:
+                print(f"Skipping thin content: {result['title']}")
+                return None
+            return result, article_text
+
+        fetched = await asyncio.gather(*(fetch(r) for r in results), return_exceptions=True)
+
+        articles = []
+        for result, outcome in zip(results, fetched):
+            if isinstance(outcome, Exception):
+                print(f"Failed to process {result['url']}: {outcome}")
+            elif outcome:
+                articles.append(outcome)
+        return articles
 
     def _scrape_article_content(self, url: str) -> str:
         try:
@@ -0,0 +1,227 @@
+from app.config import settings
+from app.utils.tokens import count_tokens, truncate_tokens
+from typing import List, Optional
+import re
+
+# Chat format overhead per message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+WEB_HEADER = "\n\n--- WEB SEARCH RESULTS ---\n"
+CHUNK_SEPARATOR = "\n\n"
+TRUNCATION_MARKER = " [...]"
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+# A truncated chunk shorter than this isn't worth including
+MIN_PARTIAL_CHUNK_TOKENS = 80
+WORD_PATTERN = re.compile(r"\w+")
+
+class PromptBuilder:
+    """
+    Assembles the chat completion messages within a token budget.
+
+    After the system template and the question, the remaining budget
+    (PROMPT_MAX_INPUT_TOKENS) is split between retrieved chunks, web results
+    and history by their configured shares; whatever one part doesn't need
+    goes to the others (chunks first, then history, then web). Near-duplicate
+    chunks are dropped, and items that don't fit are truncated or left out,
+    newest history and best-ranked chunks first.
+    """
+
+    def __init__(self, model: str = "gpt-4o"):
+        self.model = model
+
+    def build(
+        self,
+        template: str,
+        question: str,
+        chunks: List[dict],
+        web_results: List[dict],
+        history: List[dict],
+        max_tokens: Optional[int] = None,
+        summary: Optional[str] = None
+    ) -> dict:
+        """
+        Returns {"messages", "chunks", "web_results", "tokens"}: the messages
+        to send, the chunks and web results that made it into the prompt (for
+        sources) and the per-part token breakdown.
+        """
+        max_tokens = max_tokens or settings.PROMPT_MAX_INPUT_TOKENS
+
+        # Fixed cost: template with an empty context, plus the question as the user turn
+        template_tokens = self._count(template.format(context="", question=question)) + MESSAGE_OVERHEAD_TOKENS
+        question_tokens = self._count(question) + MESSAGE_OVERHEAD_TOKENS
+        available = max(max_tokens - template_tokens - question_tokens, 0)
+
+        chunks, duplicates = self._dedupe(chunks)
+        chunk_items = [(c, self._count(c["chunk_text"]) + 1) for c in chunks]
+        web_items = [(r, self._count(self._format_web(r))) for r in web_results]
+        # Cap single oversized turns (e.g. an uploaded contract saved to history)
+        history = [
+            {"role": m["role"], "content": self._truncate(m["content"], settings.PROMPT_HISTORY_MESSAGE_MAX_TOKENS)}
+            for m in history
+        ]
+        history_items = [(m, self._count(m["content"]) + MESSAGE_OVERHEAD_TOKENS) for m in history]
+
+        # The session summary stands in for older turns; it belongs to the history share
+        summary_message = None
+        if summary:
+            summary_message = {"role": "system", "content": SUMMARY_PREFIX + summary}
+            history_items.insert(0, (summary_message, self._count(summary_message["content"]) + MESSAGE_OVERHEAD_TOKENS))
+
+        allocation = self._allocate(available, {
+            "chunks": sum(t for _, t in chunk_items),
+            "web": sum(t for _, t in web_items) + (self._count(WEB_HEADER) if web_items else 0),
+            "history": sum(t for _, t in history_items),
+        })
+
+        used_web, web_text, web_tokens = self._fit_web(web_items, allocation["web"])
+        used_history, history_tokens = self._fit_history(history_items, allocation["history"], summary_message)
+        # Chunks also get whatever web results and history left unused
+        used_chunks, chunk_texts, chunk_tokens = self._fit_chunks(chunk_items, available - web_tokens - history_tokens)
+
+        context_text = CHUNK_SEPARATOR.join(chunk_texts) + web_text
+        messages = (
+            [{"role": "system", "content": template.format(context=context_text, question=question)}]
+            + used_history
+            + [{"role": "user", "content": question}]
+        )
+
+        tokens = {
+            "system": template_tokens,
+            "chunks": chunk_tokens,
+            "web": web_tokens,
+            "history": history_tokens,
+            "summary": bool(summary_message) and summary_message in used_history,
+            "question": question_tokens,
+            "budget": max_tokens,
+            "dropped": {
+                "chunks": len(chunks) - len(used_chunks),
+                "duplicate_chunks": duplicates,
+                "web": len(web_results) - len(used_web),
+                "history": len(history) - len([m for m in used_history if m is not summary_message]),
+            }
+        }
+        tokens["total"] = template_tokens + chunk_tokens + web_tokens + history_tokens + question_tokens
+
+        return {"messages": messages, "chunks": used_chunks, "web_results": used_web, "tokens": tokens}
+
+    def _allocate(self, available: int, needs: dict) -> dict:
+        shares = {
+            "chunks": settings.PROMPT_CONTEXT_SHARE,
+            "web": settings.PROMPT_WEB_SHARE,
+            "history": settings.PROMPT_HISTORY_SHARE,
+        }
+        allocation = {part: min(needs[part], int(available * shares[part])) for part in needs}
+
+        spare = available - sum(allocation.values())
+        for part in ("chunks", "history", "web"):
+            extra = min(spare, needs[part] - allocation[part])
+            allocation[part] += extra
+            spare -= extra
+        return allocation
+
+    def _dedupe(self, chunks: List[dict]) -> tuple:
+        """
+        Drops chunks that mostly repeat a better-ranked one (the same clause
+        in two documents, overlapping chunk windows). Returns (kept, dropped).
+        """
+        kept, kept_shingles = [], []
+        for chunk in chunks:
+            shingles = self._shingles(chunk["chunk_text"])
+            if any(self._overlap(shingles, other) >= settings.PROMPT_CHUNK_DEDUPE_SIMILARITY for other in kept_shingles):
+                continue
+            kept.append(chunk)
+            kept_shingles.append(shingles)
+        return kept, len(chunks) - len(kept)
+
+    def _fit_chunks(self, items: list, budget: int) -> tuple:
+        used, texts, total = [], [], 0
+        for chunk, tokens in items:
+            if total + tokens <= budget:
+                used.append(chunk)
+                texts.append(chunk["chunk_text"])
+                total += tokens
+                continue
+            # Best-ranked chunks first: truncate the first one that doesn't fit, then stop
+            remaining = budget - total - 1
+            if remaining >= MIN_PARTIAL_CHUNK_TOKENS:
+                text = self._truncate(chunk["chunk_text"], remaining)
+                used.append(chunk)
+                texts.append(text)
+                total += self._count(text) + 1
+            break
+        return used, texts, total
+
+    def _fit_web(self, items: list, budget: int) -> tuple:
+        if not items:
+            return [], "", 0
+
+        header_tokens = self._count(WEB_HEADER)
+        budget -= header_tokens
+        if budget <= 0:
+            return [], "", 0
+
+        # Results are short and roughly equally useful: share the budget evenly
+        per_result = budget // len(items)
+        used, parts, total = [], [], header_tokens
+        for result, tokens in items:
+            text = self._format_web(result)
+            if tokens > per_result:
+                if per_result < MIN_PARTIAL_CHUNK_TOKENS:
+                    continue
+                text = self._truncate(text, per_result)
+                tokens = self._count(text)
+            used.append(result)
+            parts.append(text)
+            total += tokens
+
+        if not used:
+            return [], "", 0
+        return used, WEB_HEADER + "\n".join(parts), total
+
+    def _fit_history(self, items: list, budget: int, summary_message: Optional[dict] = None) -> tuple:
+        used, total = [], 0
+        if summary_message:
+            # Summary first: it covers many turns in few tokens
+            summary_item, items = items[0], items[1:]
+            if summary_item[1] <= budget:
+                total = summary_item[1]
+            else:
+                summary_message = None
+
+        # Newest messages are the most relevant: fill backwards, keep chronological order
+        for message, tokens in reversed(items):
+            if total + tokens > budget:
+                break
+            used.insert(0, message)
+            total += tokens
+
+        if summary_message:
+            used.insert(0, summary_message)
+        return used, total
+
+    def _format_web(self, result: dict) -> str:
+        return f"Source: {result['title']}\nContent: {result['content']}"
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        if self._count(text) <= max_tokens:
+            return text
+        marker_tokens = self._count(TRUNCATION_MARKER)
+        return truncate_tokens(text, max(max_tokens - marker_tokens, 0), self.model) + TRUNCATION_MARKER
+
+    def _count(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    @staticmethod
+    def _shingles(text: str) -> set:
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) < 3:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+    @staticmethod
+    def _overlap(a: set, b: set) -> float:
+        # Containment of the smaller set: catches a chunk that is a subset of another
+        if not a or not b:
+            return 0.0
+        return len(a & b) / min(len(a), len(b))
+
+prompt_builder = PromptBuilder()
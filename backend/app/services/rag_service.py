@@ -1,50 +1,219 @@
+from app.config import settings
 from app.models.database import get_database_pool
 from app.services.embedding_service import embedding_service
-import json
+from app.services.reranker import get_reranker
+from app.services.vector_index import vector_index
+from app.utils.tokens import count_tokens
+import numpy as np
+
+RETRIEVAL_MODES = ("vector", "hybrid")
 
 class RAGService:
     def __init__(self):
-        pass
-    
+        self._rerankers = {}
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        return await embedding_service.create_embedding(query)
+
     async def retrieve_relevant_chunks(
-        self, 
-        query: str, 
-        category: str = None, 
-        top_k: int = 5
+        self,
+        query: str,
+        category: str = None,
+        top_k: int = 5,
+        query_embedding: np.ndarray = None,
+        mode: str = None,
+        reranker: str = None
     ):
+        """
+        Returns at most top_k chunks. With a reranker configured, top_k *
+        RERANK_CANDIDATE_MULTIPLIER candidates are fetched and re-scored, and
+        the result is cut by score and token budget, so it may be shorter.
+        """
+        mode = mode or settings.RETRIEVAL_MODE
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        reranker = self._get_reranker(reranker or settings.RERANKER)
+
+        # 1. Create query embedding (callers that already have one pass it in)
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query)
+
+        # 2. Similarity search with pgvector, optionally fused with full-text search
+        limit = top_k * settings.RERANK_CANDIDATE_MULTIPLIER if reranker else top_k
+        if mode == "hybrid":
+            candidates = await self.search_hybrid(query, query_embedding, category=category, limit=limit)
+        elif settings.VECTOR_INDEX_ENABLED and vector_index.ready:
+            candidates = vector_index.search(query_embedding, self._document_types(category), limit)
+        else:
+            candidates = await self.search_similar_chunks(query_embedding, category=category, limit=limit)
+
+        if not reranker:
+            return candidates
+
+        # 3. Rerank and keep only what is worth putting in the prompt
+        ranked = await reranker.rerank(query, candidates)
+        return self.select_chunks(ranked, top_k)
+
+    def select_chunks(self, ranked: list, max_chunks: int, token_budget: int = None) -> list:
+        """
+        Adaptive cut over reranked candidates: stop at max_chunks, at the first
+        chunk scoring below RERANK_MIN_SCORE or RERANK_RELATIVE_CUTOFF x the
+        best score, or when the next chunk would exceed the token budget.
+        RETRIEVAL_MIN_CHUNKS are kept regardless of score.
+        """
+        token_budget = token_budget or settings.RETRIEVAL_CONTEXT_TOKEN_BUDGET
+        if not ranked:
+            return []
+
+        threshold = max(settings.RERANK_MIN_SCORE, ranked[0]["rerank_score"] * settings.RERANK_RELATIVE_CUTOFF)
+        selected = []
+        used_tokens = 0
+
+        for chunk in ranked[:max_chunks]:
+            tokens = count_tokens(chunk["chunk_text"])
+            guaranteed = len(selected) < settings.RETRIEVAL_MIN_CHUNKS
+            if not guaranteed and (chunk["rerank_score"] < threshold or used_tokens + tokens > token_budget):
+                break
+            selected.append(chunk)
+            used_tokens += tokens
+
+        return selected
+
+    def _get_reranker(self, name: str):
+        # Built on first use: the cross-encoder loads a model
+        if name not in self._rerankers:
+            self._rerankers[name] = get_reranker(name)
+        return self._rerankers[name]
+
+    async def search_similar_chunks(self, embedding: np.ndarray, category: str = None, limit: int = 5):
         pool = await get_database_pool()
-        
-        # 1. Create query embedding
-        query_embedding = await embedding_service.create_embedding(query)
-        embedding_json = json.dumps(query_embedding)
-        
-        # 2. Similarity search with pgvector
-        # Note: We need to cast the parameter to vector using brackets or dedicated syntax
-        # Asyncpg requires specific handling for vector types if not using a type decoder.
-        # Simplest way is passing it as a string representation compatible with pgvector.
-        
-        # Construct the SQL query
-        sql = """
-            SELECT 
+        type_filter = self._document_type_filter(category)
+
+        # The pool registers pgvector's binary codec, so the array is sent as-is.
+        # The filter is on the chunk's own document_type, so the planner can use
+        # the matching partial HNSW index; iterative scans may return rows
+        # slightly out of order, hence the materialized CTE and re-sort.
+        sql = f"""
+            WITH hits AS MATERIALIZED (
+                SELECT
+                    dc.document_id,
+                    dc.chunk_text,
+                    dc.document_type,
+                    dc.embedding <=> $1::vector AS distance
+                FROM document_chunks dc
+                WHERE {type_filter}
+                ORDER BY dc.embedding <=> $1::vector
+                LIMIT $2
+            )
+            SELECT
+                h.chunk_text,
+                d.title,
+                h.document_type,
+                d.metadata,
+                1 - h.distance as similarity
+            FROM hits h
+            JOIN documents d ON h.document_id = d.id
+            ORDER BY h.distance
+        """
+
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await self._configure_index_scan(conn, category, limit)
+                results = await conn.fetch(sql, embedding, limit)
+
+        return [dict(row) for row in results]
+
+    async def search_hybrid(self, query: str, embedding: np.ndarray, category: str = None, limit: int = 5):
+        """
+        Fetches vector and full-text candidates in one round trip and fuses
+        them with reciprocal rank fusion: score = sum(1 / (k + rank)).
+        Exact terms like "Section 40" or clause numbers surface through the
+        lexical side even when their embeddings are not the nearest.
+        """
+        pool = await get_database_pool()
+        candidates = max(limit * settings.RETRIEVAL_HYBRID_CANDIDATE_MULTIPLIER, limit)
+        type_filter = self._document_type_filter(category)
+
+        # plainto_tsquery ANDs every term; OR them so natural-language
+        # questions still match, and let ts_rank_cd order by coverage
+        sql = f"""
+            WITH q AS (
+                SELECT replace(plainto_tsquery('english', $3)::text, ' & ', ' | ')::tsquery AS query
+            ),
+            vector_hits AS (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+                FROM (
+                    SELECT dc.id, dc.embedding <=> $1::vector AS distance
+                    FROM document_chunks dc
+                    WHERE {type_filter}
+                    ORDER BY dc.embedding <=> $1::vector
+                    LIMIT $4
+                ) v
+            ),
+            lexical_hits AS (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY score DESC) AS rank
+                FROM (
+                    SELECT dc.id, ts_rank_cd(dc.search_vector, q.query) AS score
+                    FROM document_chunks dc, q
+                    WHERE dc.search_vector @@ q.query
+                      AND {type_filter}
+                    ORDER BY score DESC
+                    LIMIT $4
+                ) l
+            ),
+            fused AS (
+                SELECT id, SUM(1.0 / ($5 + rank))::float8 AS rrf_score
+                FROM (SELECT * FROM vector_hits UNION ALL SELECT * FROM lexical_hits) hits
+                GROUP BY id
+            )
+            SELECT
                 dc.chunk_text,
                 d.title,
-                d.document_type,
+                dc.document_type,
                 d.metadata,
-                1 - (dc.embedding <=> $1::vector) as similarity
-            FROM document_chunks dc
+                1 - (dc.embedding <=> $1::vector) as similarity,
+                f.rrf_score
+            FROM fused f
+            JOIN document_chunks dc ON dc.id = f.id
             JOIN documents d ON dc.document_id = d.id
-            WHERE ($2::varchar IS NULL OR d.document_type = $2)
-            ORDER BY dc.embedding <=> $1::vector
-            LIMIT $3
+            ORDER BY f.rrf_score DESC
+            LIMIT $2
         """
-        
+
         async with pool.acquire() as conn:
-            results = await conn.fetch(sql, embedding_json, category, top_k)
-            
+            async with conn.transaction():
+                await self._configure_index_scan(conn, category, candidates)
+                results = await conn.fetch(sql, embedding, limit, query, candidates, settings.RETRIEVAL_RRF_K)
+
         return [dict(row) for row in results]
 
-    async def search_similar_chunks(self, embedding, limit: int = 5):
-        # Compatibility alias if needed, or better yet, fix usage in AgentService
-        pass
+    def _document_types(self, category: str = None) -> list:
+        if not category:
+            return []
+        return settings.RETRIEVAL_CATEGORY_DOCUMENT_TYPES.get(category, [])
+
+    def _document_type_filter(self, category: str = None) -> str:
+        """
+        SQL predicate restricting chunks to the category's document types.
+        Inlined as literals (they come from Settings, not the request) so the
+        predicate matches a partial index instead of a generic parameter plan.
+        """
+        types = self._document_types(category)
+        if not types:
+            return "TRUE"
+        literals = ", ".join("'" + t.replace("'", "''") + "'" for t in types)
+        return f"dc.document_type IN ({literals})"
+
+    async def _configure_index_scan(self, conn, category: str, limit: int):
+        # SET LOCAL: only for the surrounding transaction
+        if self._document_types(category):
+            ef_search = max(settings.RETRIEVAL_HNSW_EF_SEARCH_FILTERED, limit * 4)
+        else:
+            ef_search = max(settings.RETRIEVAL_HNSW_EF_SEARCH, limit * 2)
+
+        statements = [f"SET LOCAL hnsw.ef_search = {int(ef_search)}"]
+        if settings.RETRIEVAL_HNSW_ITERATIVE_SCAN and self._document_types(category):
+            statements.append(f"SET LOCAL hnsw.iterative_scan = {settings.RETRIEVAL_HNSW_ITERATIVE_SCAN}")
+        await conn.execute("; ".join(statements))
 
 rag_service = RAGService()
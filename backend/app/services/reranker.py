@@ -0,0 +1,111 @@
+from app.config import settings
+from typing import List, Optional
+import abc
+import asyncio
+import math
+import re
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Section/clause/article numbers and years: exact matches matter in legal text
+REFERENCE_PATTERN = re.compile(r"\b(?:section|clause|article|rule|part)\s+\d+[a-z]?\b|\b\d{2,4}\b")
+STOPWORDS = {
+    "a", "about", "am", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "if", "in", "is", "it", "kenya", "me", "my", "of", "on", "or", "should", "that", "the",
+    "there", "to", "was", "what", "when", "where", "which", "who", "will", "with", "you", "your"
+}
+
+class Reranker(abc.ABC):
+    """
+    Re-scores retrieval candidates against the query. Implementations set
+    "rerank_score" on each candidate, normalized to [0, 1] so RAGService can
+    apply the same score cut-offs whichever reranker is configured, and
+    return the candidates best-first.
+    """
+    name = "base"
+
+    @abc.abstractmethod
+    async def rerank(self, query: str, candidates: List[dict]) -> List[dict]:
+        ...
+
+class LexicalReranker(Reranker):
+    """
+    Cheap CPU scorer: blends the candidate's vector similarity (relative to
+    the best candidate) with how many query terms the chunk covers, plus a
+    bonus for exact section/clause numbers from the query.
+    """
+    name = "lexical"
+
+    def __init__(self, similarity_weight: float = 0.5, coverage_weight: float = 0.4, reference_weight: float = 0.1):
+        self.similarity_weight = similarity_weight
+        self.coverage_weight = coverage_weight
+        self.reference_weight = reference_weight
+
+    async def rerank(self, query: str, candidates: List[dict]) -> List[dict]:
+        if not candidates:
+            return []
+
+        terms = {self._stem(w) for w in WORD_PATTERN.findall(query.lower()) if w not in STOPWORDS}
+        references = set(REFERENCE_PATTERN.findall(query.lower()))
+        best_similarity = max((c.get("similarity") or 0.0) for c in candidates) or 1.0
+
+        for candidate in candidates:
+            text = f"{candidate.get('title') or ''}\n{candidate['chunk_text']}".lower()
+            words = {self._stem(w) for w in WORD_PATTERN.findall(text)}
+
+            coverage = len(terms & words) / len(terms) if terms else 0.0
+            reference = sum(1 for r in references if r in text) / len(references) if references else 0.0
+            similarity = max(candidate.get("similarity") or 0.0, 0.0) / best_similarity
+
+            weight = self.similarity_weight + self.coverage_weight + (self.reference_weight if references else 0.0)
+            score = self.similarity_weight * similarity + self.coverage_weight * coverage + self.reference_weight * reference
+            candidate["rerank_score"] = score / weight
+
+        return sorted(candidates, key=lambda c: c["rerank_score"], reverse=True)
+
+    @staticmethod
+    def _stem(word: str) -> str:
+        # Crude suffix folding: "terminated"/"termination" -> "termin"
+        return word[:6] if len(word) > 6 else word
+
+class CrossEncoderReranker(Reranker):
+    """
+    Local cross-encoder (sentence-transformers) scoring each (query, chunk)
+    pair on CPU. Needs the optional sentence-transformers package.
+    """
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str = settings.RERANK_CROSS_ENCODER_MODEL):
+        if CrossEncoder is None:
+            raise RuntimeError("cross-encoder reranking requires the sentence-transformers package")
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    async def rerank(self, query: str, candidates: List[dict]) -> List[dict]:
+        if not candidates:
+            return []
+
+        pairs = [(query, c["chunk_text"]) for c in candidates]
+        # Model inference is CPU-bound; keep it off the event loop
+        logits = await asyncio.to_thread(self.model.predict, pairs)
+
+        for candidate, logit in zip(candidates, logits):
+            candidate["rerank_score"] = 1 / (1 + math.exp(-float(logit)))
+
+        return sorted(candidates, key=lambda c: c["rerank_score"], reverse=True)
+
+RERANKERS = {
+    "lexical": LexicalReranker,
+    "cross-encoder": CrossEncoderReranker,
+}
+
+def get_reranker(name: str) -> Optional[Reranker]:
+    """Builds the reranker registered under name; "none" disables reranking."""
+    if not name or name == "none":
+        return None
+    if name not in RERANKERS:
+        raise ValueError(f"Unknown reranker: {name}")
+    return RERANKERS[name]()
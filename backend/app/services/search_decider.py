@@ -0,0 +1,216 @@
+from app.config import settings
+from app.models.database import db
+from app.services.embedding_service import embedding_service
+from app.services.model_router import model_router
+from app.utils.prompt_templates import SEARCH_DECISION_PROMPT
+from app.utils.tokens import truncate_tokens
+from typing import Awaitable, Optional
+import asyncio
+import datetime
+import json
+import numpy as np
+import random
+import re
+import uuid
+
+# Questions about events, news or anything time-sensitive
+RECENCY_PATTERN = re.compile(
+    r"\b(latest|news|today|yesterday|this (week|month|year)|recent(ly)?|current(ly)?|ongoing|right now|update[sd]?|"
+    r"announce[sd]?|strike[sd]?|go-?slow|protest|court (ruling|case|order)|ruled|judg(e)?ment|new (law|bill|rates?)|"
+    r"finance (act|bill)|gazette[sd]?|budget)\b",
+    re.IGNORECASE
+)
+# Questions answered by statutes, CBAs and contracts already in the corpus
+KNOWLEDGE_PATTERN = re.compile(
+    r"\b(am i entitled|can (my|an) employer|is it (legal|lawful)|what does (section|clause|the act)|"
+    r"how (many|much|long)|my (contract|employer|salary|leave)|notice period|what (is|are) (my|the) rights?|"
+    r"define|definition|meaning of)\b",
+    re.IGNORECASE
+)
+YEAR_PATTERN = re.compile(r"\b(20\d{2})\b")
+# What the reference decision has seen since it started running alongside retrieval
+SHADOW_CONTEXT = "Not available (document retrieval runs in parallel with this decision)."
+
+# Labelled examples; queries are compared to them by embedding similarity
+SEARCH_EXEMPLARS = [
+    "Are doctors in Kenya on strike right now?",
+    "Latest news on the teachers' union pay negotiations",
+    "What did the Employment and Labour Relations Court rule this week?",
+    "Has the government announced a new minimum wage this year?",
+    "Is the KUPPET strike still going on?",
+    "What changed in the new Finance Act for payslip deductions?",
+    "Did parliament pass the housing levy amendment?",
+    "Current status of the nurses' CBA dispute",
+    "Which unions announced a go-slow recently?",
+    "What are the new NSSF contribution rates announced recently?",
+]
+NO_SEARCH_EXEMPLARS = [
+    "How many days of annual leave am I entitled to?",
+    "Can my employer fire me without notice?",
+    "What does Section 40 of the Employment Act say about redundancy?",
+    "How long is maternity leave in Kenya?",
+    "Is it legal for my employer to withhold my salary?",
+    "What is the notice period for terminating a monthly contract?",
+    "What are my rights if I am injured at work?",
+    "Can I join a trade union while on probation?",
+    "What should a valid employment contract contain?",
+    "How is severance pay calculated?",
+]
+
+class SearchDecider:
+    """
+    Decides whether a chat message needs a web search, cheapest signal first:
+
+    1. local: recency/knowledge keyword heuristics and embedding similarity
+       to labelled exemplars. A confident "search" stops here.
+    2. local + retrieval: the best RAG similarity is folded in (a strong
+       corpus match argues against searching).
+    3. llm: only scores left in the ambiguous band go to a small model.
+
+    Every decision is logged to search_decisions. A sample can also be
+    decided by the reference model (SEARCH_DECISION_SHADOW_RATE) in the
+    background, so the local tiers can be measured against it.
+    """
+
+    def __init__(self):
+        self.lower = settings.SEARCH_DECISION_LOWER
+        self.upper = settings.SEARCH_DECISION_UPPER
+        self._exemplars = None
+        self._exemplar_lock = asyncio.Lock()
+        self._background_tasks = set()
+
+    async def decide(self, message: str, query_embedding: np.ndarray, retrieval: Awaitable[list]) -> Optional[str]:
+        """
+        Returns a search query, or None when no search is needed. retrieval
+        is the in-flight RAG retrieval; it is only awaited when tier 1 is
+        not confident on its own.
+        """
+        features = self._heuristic_features(message)
+        features.update(await self._exemplar_features(query_embedding))
+        score = self._score(features)
+        tier = "local"
+
+        if score < self.upper:
+            chunks = await retrieval
+            features["max_rag_similarity"] = max((c.get("similarity") or 0.0 for c in chunks), default=0.0)
+            score = self._score(features)
+            tier = "local+retrieval"
+
+        if score >= self.upper:
+            search_query = self._search_query(message)
+        elif score <= self.lower:
+            search_query = None
+        else:
+            tier = "llm"
+            chunks = await retrieval
+            context = truncate_tokens("\n\n".join(c["chunk_text"] for c in chunks[:3]), settings.SEARCH_DECISION_CONTEXT_TOKENS)
+            search_query = await self._llm_decision(message, context or "No relevant documents found.", "search_decision")
+
+        self._record(message, tier, score, features, search_query)
+        return search_query
+
+    def _heuristic_features(self, message: str) -> dict:
+        this_year = datetime.date.today().year
+        years = [int(y) for y in YEAR_PATTERN.findall(message)]
+        return {
+            "recency_terms": len(RECENCY_PATTERN.findall(message)),
+            "knowledge_terms": len(KNOWLEDGE_PATTERN.findall(message)),
+            "recent_year": any(y >= this_year - 1 for y in years),
+        }
+
+    async def _exemplar_features(self, query_embedding: np.ndarray) -> dict:
+        exemplars = await self._load_exemplars()
+        if exemplars is None:
+            return {}
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        search_matrix, no_search_matrix = exemplars
+        return {
+            "search_similarity": float(np.max(search_matrix @ query)),
+            "no_search_similarity": float(np.max(no_search_matrix @ query)),
+        }
+
+    def _score(self, features: dict) -> float:
+        """Rough probability that a search is needed, in [0, 1]."""
+        score = 0.5
+        score += min(features["recency_terms"] * 0.2, 0.35)
+        score += 0.15 if features["recent_year"] else 0.0
+        score -= min(features["knowledge_terms"] * 0.15, 0.25)
+
+        if "search_similarity" in features:
+            margin = features["search_similarity"] - features["no_search_similarity"]
+            score += settings.SEARCH_DECISION_EXEMPLAR_WEIGHT * margin
+
+        max_rag = features.get("max_rag_similarity")
+        if max_rag is not None:
+            if max_rag >= settings.SEARCH_DECISION_RAG_STRONG:
+                score -= 0.2
+            elif max_rag < settings.SEARCH_DECISION_RAG_WEAK:
+                score += 0.15
+
+        return min(max(score, 0.0), 1.0)
+
+    def _search_query(self, message: str) -> str:
+        if "kenya" not in message.lower():
+            return f"{message} Kenya"
+        return message
+
+    async def _llm_decision(self, message: str, context: str, stage: str) -> Optional[str]:
+        decision_prompt = SEARCH_DECISION_PROMPT.format(context=context, question=message)
+
+        try:
+            response = await model_router.complete(model_router.route(stage), [{"role": "user", "content": decision_prompt}])
+            result = response.choices[0].message.content.strip()
+
+            if "NO_SEARCH" in result:
+                return None
+            return result
+        except Exception as e:
+            print(f"Search decision failed: {e}")
+            return None
+
+    async def _load_exemplars(self):
+        if self._exemplars is None:
+            async with self._exemplar_lock:
+                if self._exemplars is None:
+                    try:
+                        # Served from the embedding cache after the first run. A chat
+                        # request is waiting on this, so it must not queue behind ingestion
+                        embeddings = await embedding_service.batch_embed(SEARCH_EXEMPLARS + NO_SEARCH_EXEMPLARS, priority="interactive")
+                    except Exception as e:
+                        print(f"Search exemplar embedding failed: {e}")
+                        return None
+                    matrix = np.vstack(embeddings).astype(np.float32)
+                    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+                    self._exemplars = (matrix[:len(SEARCH_EXEMPLARS)], matrix[len(SEARCH_EXEMPLARS):])
+        return self._exemplars
+
+    def _record(self, message: str, tier: str, score: float, features: dict, search_query: Optional[str]):
+        if not settings.SEARCH_DECISION_LOG:
+            return
+        shadow = random.random() < settings.SEARCH_DECISION_SHADOW_RATE
+        self._spawn(self._log(message, tier, score, features, search_query, shadow))
+
+    async def _log(self, message: str, tier: str, score: float, features: dict, search_query: Optional[str], shadow: bool):
+        try:
+            reference = None
+            if shadow:
+                # Reference decision on the question alone, as the chat path used to make it
+                reference = await self._llm_decision(message, SHADOW_CONTEXT, "search_reference")
+
+            await db.execute("""
+                INSERT INTO search_decisions (id, query, tier, score, features, search, search_query, reference_search, reference_query)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            """, uuid.uuid4(), message, tier, score, json.dumps(features), search_query is not None, search_query,
+                (reference is not None) if shadow else None, reference)
+        except Exception as e:
+            print(f"Search decision log failed: {e}")
+
+    def _spawn(self, coro):
+        # Keep a reference so the task isn't garbage collected mid-flight
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+search_decider = SearchDecider()
@@ -0,0 +1,90 @@
+from app.config import settings
+from app.models.database import db
+from app.services.model_router import model_router
+from app.utils.prompt_templates import SESSION_SUMMARY_PROMPT
+from app.utils.tokens import truncate_tokens
+
+class SessionMemory:
+    """
+    Conversation memory for the chat prompt: a running summary stored on
+    chat_sessions plus the last SESSION_RECENT_MESSAGES turns verbatim.
+
+    fold() runs after a response has been sent. Once enough turns have
+    fallen out of the verbatim window it folds them into the summary with
+    a small model, so the history part of the prompt stays the same size
+    however long the session runs.
+    """
+
+    def __init__(self):
+        self.recent_messages = settings.SESSION_RECENT_MESSAGES
+        self._folding = set()
+
+    async def load(self, session_id: str) -> dict:
+        """Returns {"summary", "messages"}: the summary (or None) and the turns after it."""
+        session = await db.fetch_row("SELECT summary, summarized_until FROM chat_sessions WHERE id = $1", session_id)
+        summary = session["summary"] if session else None
+        summarized_until = session["summarized_until"] if session else None
+
+        rows = await db.fetch("""
+            SELECT role, content FROM messages
+            WHERE session_id = $1 AND ($2::timestamp IS NULL OR created_at > $2)
+            ORDER BY created_at DESC
+            LIMIT $3
+        """, session_id, summarized_until, self.recent_messages)
+
+        return {
+            "summary": summary,
+            "messages": [{"role": r["role"], "content": r["content"]} for r in reversed(rows)]
+        }
+
+    async def fold(self, session_id: str):
+        # One fold per session at a time in this process; across processes
+        # the conditional UPDATE below makes the slower one a no-op
+        if session_id in self._folding:
+            return
+        self._folding.add(session_id)
+        try:
+            await self._fold(session_id)
+        except Exception as e:
+            print(f"Session summary failed for {session_id}: {e}")
+        finally:
+            self._folding.discard(session_id)
+
+    async def _fold(self, session_id: str):
+        session = await db.fetch_row("SELECT summary, summarized_until FROM chat_sessions WHERE id = $1", session_id)
+        if not session:
+            return
+
+        rows = await db.fetch("""
+            SELECT role, content, created_at FROM messages
+            WHERE session_id = $1 AND ($2::timestamp IS NULL OR created_at > $2)
+            ORDER BY created_at
+        """, session_id, session["summarized_until"])
+
+        # Everything before the verbatim window, once there's enough of it
+        to_fold = rows[:-self.recent_messages] if len(rows) > self.recent_messages else []
+        if len(to_fold) < settings.SESSION_SUMMARY_MIN_MESSAGES:
+            return
+
+        conversation = "\n\n".join(
+            f"{r['role'].upper()}: {truncate_tokens(r['content'], settings.PROMPT_HISTORY_MESSAGE_MAX_TOKENS)}"
+            for r in to_fold
+        )
+        max_words = int(settings.SESSION_SUMMARY_MAX_TOKENS * 0.75)
+        response = await model_router.complete(
+            model_router.route("summarization"),
+            [{"role": "user", "content": SESSION_SUMMARY_PROMPT.format(
+                summary=session["summary"] or "(none yet)",
+                conversation=conversation,
+                max_words=max_words
+            )}]
+        )
+        summary = response.choices[0].message.content.strip()
+
+        await db.execute("""
+            UPDATE chat_sessions
+            SET summary = $2, summarized_until = $3, updated_at = NOW()
+            WHERE id = $1 AND summarized_until IS NOT DISTINCT FROM $4
+        """, session_id, summary, to_fold[-1]["created_at"], session["summarized_until"])
+
+session_memory = SessionMemory()
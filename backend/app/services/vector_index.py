@@ -0,0 +1,169 @@
+from app.config import settings
+from app.models.database import db
+from typing import List, Optional
+import asyncio
+import numpy as np
+
+class _Snapshot:
+    """Immutable view of the index; searches read one, refreshes swap it."""
+
+    def __init__(self, ids, matrix, texts, doc_ids, type_codes, type_names, documents, last_seq):
+        self.ids = ids                  # chunk ids, row-aligned with matrix
+        self.matrix = matrix            # (n, dim) float32, rows L2-normalized
+        self.texts = texts
+        self.doc_ids = doc_ids
+        self.type_codes = type_codes    # int16 index into type_names
+        self.type_names = type_names
+        self.documents = documents      # document id -> {"title", "metadata"}
+        self.last_seq = last_seq
+
+    @classmethod
+    def empty(cls):
+        return cls([], np.empty((0, 0), dtype=np.float32), [], [], np.empty(0, dtype=np.int16), [], {}, 0)
+
+class VectorIndex:
+    """
+    Optional in-process copy of document_chunks for exact top-k search
+    with a single matmul, so vector retrieval doesn't hold a DB connection.
+
+    Refreshes are incremental: the corpus version tells us something
+    changed, document_chunks.change_seq tells us which rows were inserted or
+    updated since the last load, and comparing chunk ids drops deletions.
+    """
+
+    def __init__(self):
+        self._snapshot = _Snapshot.empty()
+        self._version = None
+        self._lock = asyncio.Lock()
+        self.ready = False
+
+    async def refresh(self, force: bool = False):
+        async with self._lock:
+            pool = await db.get_db()
+            async with pool.acquire() as conn:
+                # One consistent view for the marker and the rows it covers
+                async with conn.transaction(isolation="repeatable_read", readonly=True):
+                    version = await conn.fetchval("SELECT SUM(version)::bigint FROM corpus_state")
+                    if version == self._version and not force:
+                        return
+
+                    snapshot = _Snapshot.empty() if force else self._snapshot
+                    live_ids = await conn.fetch("SELECT id FROM document_chunks")
+                    changed = await conn.fetch("""
+                        SELECT id, document_id, chunk_text, document_type, embedding, change_seq
+                        FROM document_chunks
+                        WHERE change_seq > $1 AND embedding IS NOT NULL
+                    """, snapshot.last_seq)
+
+                    # change_seq is assigned at insert time, so a transaction that
+                    # commits late can land below last_seq; pick those up by id
+                    known = set(snapshot.ids) | {row["id"] for row in changed}
+                    missing = [row["id"] for row in live_ids if row["id"] not in known]
+                    if missing:
+                        changed += await conn.fetch("""
+                            SELECT id, document_id, chunk_text, document_type, embedding, change_seq
+                            FROM document_chunks
+                            WHERE id = ANY($1::uuid[]) AND embedding IS NOT NULL
+                        """, missing)
+
+                    documents = await conn.fetch("SELECT id, title, metadata FROM documents")
+
+            # Array work is CPU-bound; keep it off the event loop
+            self._snapshot = await asyncio.to_thread(self._apply, snapshot, live_ids, changed, documents)
+            self._version = version
+            self.ready = True
+            print(f"Vector index refreshed: {len(self._snapshot.ids)} chunks ({len(changed)} loaded)")
+
+    async def run_refresh_loop(self, interval: float = settings.VECTOR_INDEX_REFRESH_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Vector index refresh failed: {e}")
+
+    def search(self, embedding: np.ndarray, document_types: Optional[List[str]] = None, limit: int = 5) -> list:
+        """
+        Exact cosine top-k, returning rows shaped like RAGService's pgvector query.
+        """
+        snapshot = self._snapshot
+        if not snapshot.ids:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = snapshot.matrix @ query
+
+        if document_types:
+            codes = [i for i, name in enumerate(snapshot.type_names) if name in document_types]
+            mask = np.isin(snapshot.type_codes, codes)
+            scores = np.where(mask, scores, -np.inf)
+            available = int(mask.sum())
+        else:
+            available = len(scores)
+
+        k = min(limit, available)
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for i in top:
+            doc = snapshot.documents.get(snapshot.doc_ids[i], {})
+            results.append({
+                "chunk_text": snapshot.texts[i],
+                "title": doc.get("title"),
+                "document_type": snapshot.type_names[snapshot.type_codes[i]] if snapshot.type_codes[i] >= 0 else None,
+                "metadata": doc.get("metadata"),
+                "similarity": float(scores[i])
+            })
+        return results
+
+    @staticmethod
+    def _apply(snapshot: _Snapshot, live_ids: list, changed: list, documents: list) -> _Snapshot:
+        live = {row["id"] for row in live_ids}
+        changed_ids = {row["id"] for row in changed}
+
+        # Keep rows that still exist and weren't rewritten
+        keep = [i for i, chunk_id in enumerate(snapshot.ids) if chunk_id in live and chunk_id not in changed_ids]
+
+        type_names = list(snapshot.type_names)
+        type_lookup = {name: i for i, name in enumerate(type_names)}
+
+        def type_code(name):
+            if name is None:
+                return -1
+            if name not in type_lookup:
+                type_lookup[name] = len(type_names)
+                type_names.append(name)
+            return type_lookup[name]
+
+        ids = [snapshot.ids[i] for i in keep] + [row["id"] for row in changed]
+        texts = [snapshot.texts[i] for i in keep] + [row["chunk_text"] for row in changed]
+        doc_ids = [snapshot.doc_ids[i] for i in keep] + [row["document_id"] for row in changed]
+        type_codes = np.concatenate([
+            snapshot.type_codes[keep],
+            np.array([type_code(row["document_type"]) for row in changed], dtype=np.int16)
+        ]).astype(np.int16)
+
+        parts = []
+        if keep:
+            parts.append(snapshot.matrix[keep])
+        if changed:
+            fresh = np.vstack([row["embedding"] for row in changed]).astype(np.float32)
+            norms = np.linalg.norm(fresh, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            parts.append(fresh / norms)
+        matrix = np.ascontiguousarray(np.vstack(parts)) if parts else np.empty((0, 0), dtype=np.float32)
+
+        last_seq = max([snapshot.last_seq] + [row["change_seq"] for row in changed])
+        docs = {row["id"]: {"title": row["title"], "metadata": row["metadata"]} for row in documents}
+
+        return _Snapshot(ids, matrix, texts, doc_ids, type_codes, type_names, docs, last_seq)
+
+vector_index = VectorIndex()
@@ -1,45 +1,204 @@
 from app.config import settings
-from tavily import TavilyClient
+from collections import OrderedDict
+from typing import List, Optional
+from urllib.parse import urlsplit
+import abc
 import asyncio
+import httpx
+import re
+import time
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Shared across services: one connection pool per process
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.WEB_SEARCH_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.WEB_SEARCH_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WEB_SEARCH_MAX_CONNECTIONS
+            )
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+class SearchProvider(abc.ABC):
+    """A search API; search() returns normalized {"title", "url", "content", "source"} results."""
+    name = "base"
+
+    @abc.abstractmethod
+    async def search(self, client: httpx.AsyncClient, query: str, max_results: int) -> List[dict]:
+        ...
+
+class TavilyProvider(SearchProvider):
+    name = "tavily"
+
+    def __init__(self, api_key: str, base_url: str = settings.TAVILY_BASE_URL):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+
+    async def search(self, client: httpx.AsyncClient, query: str, max_results: int) -> List[dict]:
+        response = await client.post(f"{self.base_url}/search", json={
+            "api_key": self.api_key,
+            "query": query,
+            "search_depth": settings.TAVILY_SEARCH_DEPTH,
+            "max_results": max_results
+        })
+        response.raise_for_status()
+        return [
+            {"title": r.get("title"), "url": r.get("url"), "content": r.get("content"), "source": "Web Search"}
+            for r in response.json().get("results", [])
+        ]
+
+class SerperProvider(SearchProvider):
+    name = "serper"
+
+    def __init__(self, api_key: str, base_url: str = settings.SERPER_BASE_URL):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+
+    async def search(self, client: httpx.AsyncClient, query: str, max_results: int) -> List[dict]:
+        response = await client.post(
+            f"{self.base_url}/search",
+            headers={"X-API-KEY": self.api_key},
+            json={"q": query, "num": max_results, "gl": "ke"}
+        )
+        response.raise_for_status()
+        return [
+            {"title": r.get("title"), "url": r.get("link"), "content": r.get("snippet"), "source": "Web Search"}
+            for r in response.json().get("organic", [])[:max_results]
+        ]
+
+def default_providers() -> List[SearchProvider]:
+    providers = []
+    if settings.TAVILY_API_KEY:
+        providers.append(TavilyProvider(settings.TAVILY_API_KEY))
+    if settings.SERPER_API_KEY:
+        providers.append(SerperProvider(settings.SERPER_API_KEY))
+    return providers
 
 class WebSearchService:
-    def __init__(self):
-        # We'll use Tavily as primary, but can abstract this later.
-        # Ensure TAVILY_API_KEY is in .env
-        self.api_key = settings.TAVILY_API_KEY
-        self.client = TavilyClient(api_key=self.api_key) if self.api_key else None
+    """
+    Web search over every configured provider at once, on the shared
+    httpx client. WEB_SEARCH_STRATEGY "first" returns the first non-empty
+    response and cancels the rest; "merge" waits for all of them and
+    interleaves their results, deduplicated by URL.
+
+    Results are cached per normalized query for WEB_SEARCH_CACHE_TTL_SECONDS,
+    and concurrent searches for the same query share one request, so a
+    burst of identical questions costs one API call.
+
+    Pass client (e.g. with an httpx.MockTransport) or providers to swap the
+    transport; the provider base URLs in Settings can point at a stub server.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, providers: Optional[List[SearchProvider]] = None):
+        self._client = client
+        self.providers = default_providers() if providers is None else providers
+        self.strategy = settings.WEB_SEARCH_STRATEGY
+        self.ttl_seconds = settings.WEB_SEARCH_CACHE_TTL_SECONDS
+        self.max_entries = settings.WEB_SEARCH_CACHE_MAX_ENTRIES
+        self._cache: OrderedDict[tuple, tuple] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
 
     async def search(self, query: str, max_results: int = 5) -> list:
         """
         Performs a web search and returns normalized results.
         """
-        if not self.client:
+        if not self.providers:
             print("Warning: Web Search disabled (No API Key)")
             return []
 
+        key = (self._normalize(query), max_results)
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            return [dict(r) for r in cached[1]]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, query, max_results))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded: one caller going away must not cancel the search for the others
+        results = await asyncio.shield(task)
+        return [dict(r) for r in results]
+
+    async def _fetch(self, key: tuple, query: str, max_results: int) -> list:
+        if self.strategy == "merge":
+            responses = await asyncio.gather(*(self._search_provider(p, query, max_results) for p in self.providers))
+            results = self._merge(responses, max_results)
+        else:
+            results = await self._first(query, max_results)
+
+        # Failures and empty responses aren't cached, so the next ask retries
+        if results:
+            self._cache[key] = (time.monotonic() + self.ttl_seconds, results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return results
+
+    async def _first(self, query: str, max_results: int) -> list:
+        tasks = [asyncio.create_task(self._search_provider(p, query, max_results)) for p in self.providers]
         try:
-            # Tavily's python SDK is synchronous, so we run it in a thread/executor if needed, 
-            # or just call it directly if it's fast enough. 
-            # For better async support, we might wrap it.
-            # However, for this MVP, we'll assume it's acceptable or use asyncio.to_thread
-            
-            response = await asyncio.to_thread(
-                self.client.search,
-                query=query,
-                search_depth="advanced",
-                max_results=max_results
-            )
-            
-            results = []
-            for result in response.get('results', []):
-                results.append({
-                    "title": result.get('title'),
-                    "url": result.get('url'),
-                    "content": result.get('content'),
-                    "source": "Web Search" 
-                })
-            return results
-            
+            for next_done in asyncio.as_completed(tasks):
+                results = await next_done
+                if results:
+                    return results
+            return []
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _search_provider(self, provider: SearchProvider, query: str, max_results: int) -> list:
+        started = time.perf_counter()
+        try:
+            results = await provider.search(self._client or get_http_client(), query, max_results)
+            print(f"Web search via {provider.name}: {len(results)} results in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return [r for r in results if r.get("url")]
         except Exception as e:
-            print(f"Web Search Error: {e}")
+            print(f"Web Search Error ({provider.name}): {e}")
             return []
+
+    def _merge(self, responses: List[list], max_results: int) -> list:
+        """Round-robin over the providers' rankings, keeping the first result per URL."""
+        merged, seen = [], {}
+        for rank in range(max((len(r) for r in responses), default=0)):
+            for results in responses:
+                if rank >= len(results):
+                    continue
+                result = results[rank]
+                url = self._url_key(result["url"])
+                if url in seen:
+                    # Same page from two providers: keep the fuller text
+                    kept = seen[url]
+                    if len(result.get("content") or "") > len(kept.get("content") or ""):
+                        kept["content"] = result["content"]
+                    continue
+                seen[url] = dict(result)
+                merged.append(seen[url])
+        return merged[:max_results]
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(PUNCTUATION.sub(" ", query.lower()).split())
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return f"{host}{parts.path.rstrip('/')}?{parts.query}"
+
+web_search_service = WebSearchService()
@@ -0,0 +1,95 @@
+"""
+Ingestion worker. Runs separately from the API so document and news
+ingestion, and contract analysis jobs, never share an event loop with
+chat traffic:
+
+    python -m app.worker --concurrency 4
+
+Scale ingestion throughput by running more of these.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import traceback
+
+from app.config import settings
+from app.models.database import db
+from app.services.contract_jobs import contract_job_service
+from app.services.document_parser import shutdown_parser_pool
+from app.services.ingestion_service import ingestion_service
+from app.services.job_queue import job_queue
+from app.services.llm_gateway import llm_gateway
+from app.services.web_search_service import close_http_client
+
+class IngestionWorker:
+    def __init__(self, concurrency: int = settings.WORKER_CONCURRENCY):
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    async def run(self):
+        await db.connect()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stopping.set)
+
+        print(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        try:
+            await asyncio.gather(*(self._poll(slot) for slot in range(self.concurrency)))
+        finally:
+            shutdown_parser_pool()
+            await close_http_client()
+            await llm_gateway.close()
+            await db.disconnect()
+
+    async def _poll(self, slot: int):
+        while not self._stopping.is_set():
+            try:
+                job = await job_queue.claim(f"{self.worker_id}/{slot}")
+            except Exception as e:
+                print(f"Job claim failed: {e}")
+                job = None
+
+            if not job:
+                # Sleep until the next poll, waking early on shutdown
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        print(f"Running {job['job_type']} job {job['id']} (attempt {job['attempts']})")
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+        try:
+            if job["job_type"] == "contract_analysis":
+                result = await contract_job_service.run(job)
+            else:
+                result = await ingestion_service.run_job(job)
+            await job_queue.complete(job["id"], result)
+            print(f"Job {job['id']} succeeded")
+        except Exception as e:
+            traceback.print_exc()
+            await job_queue.fail(job["id"], str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        # Keeps long stages (e.g. embedding a statute book) from looking abandoned
+        interval = settings.JOB_LOCK_TIMEOUT_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job_queue.heartbeat(job_id)
+            except Exception as e:
+                print(f"Heartbeat failed for job {job_id}: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ingestion job worker.")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(IngestionWorker(concurrency=args.concurrency).run())
@@ -39,5 +39,170 @@ CREATE TABLE IF NOT EXISTS messages (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Embedding cache keyed by model and sha256 of the normalized text
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model VARCHAR(100) NOT NULL,
+    text_hash TEXT NOT NULL,
+    embedding vector(1536) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (model, text_hash)
+);
+
+-- Ingestion jobs (document uploads, news scrapes), claimed by workers with SKIP LOCKED
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id UUID PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL, -- 'document', 'news', 'contract_analysis'
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'succeeded', 'failed'
+    stage VARCHAR(20), -- 'parsed', 'chunked', 'embedded', 'indexed'
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    progress JSONB NOT NULL DEFAULT '{}'::jsonb,
+    result JSONB,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+    locked_by TEXT,
+    locked_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ingestion_jobs_claim_idx ON ingestion_jobs (status, run_after);
+-- Interactive jobs (contract analysis) are claimed ahead of batch ingestion
+ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS priority SMALLINT NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS ingestion_jobs_created_idx ON ingestion_jobs (created_at DESC);
+
 -- Create HNSW index for faster similarity search
-CREATE INDEX ON document_chunks USING hnsw (embedding vector_cosine_ops);
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_idx ON document_chunks USING hnsw (embedding vector_cosine_ops);
+
+-- Document type copied onto chunks so category filters don't need a join
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS document_type VARCHAR(50);
+UPDATE document_chunks dc SET document_type = d.document_type
+    FROM documents d
+    WHERE dc.document_id = d.id AND dc.document_type IS NULL AND d.document_type IS NOT NULL;
+
+-- Stable document identity for re-ingestion (explicit key or source URL):
+-- re-uploading a document with the same key updates it in place
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS document_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS documents_document_key_idx ON documents (document_key) WHERE document_key IS NOT NULL;
+UPDATE documents d SET document_key = d.source_url
+    WHERE d.document_key IS NULL AND d.source_url IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM documents o WHERE o.source_url = d.source_url AND o.id <> d.id)
+      AND NOT EXISTS (SELECT 1 FROM documents o WHERE o.document_key = d.source_url);
+
+-- Per-chunk content hash (sha256 of chunk_text) so re-ingestion only
+-- re-embeds and rewrites chunks whose text changed
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+UPDATE document_chunks SET content_hash = encode(sha256(convert_to(chunk_text, 'UTF8')), 'hex') WHERE content_hash IS NULL;
+CREATE INDEX IF NOT EXISTS document_chunks_document_id_idx ON document_chunks (document_id);
+
+-- Monotonic change marker per chunk, bumped on insert and on updates of the
+-- columns in-memory indexes cache, so they can load just the rows written
+-- since their last refresh. chunk_index/metadata updates don't bump it and
+-- can stay HOT (no index churn) during re-ingestion.
+CREATE SEQUENCE IF NOT EXISTS document_chunks_change_seq;
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS change_seq BIGINT;
+CREATE INDEX IF NOT EXISTS document_chunks_change_seq_idx ON document_chunks (change_seq);
+
+CREATE OR REPLACE FUNCTION set_chunk_change_seq() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.change_seq := nextval('document_chunks_change_seq');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS document_chunks_change_seq ON document_chunks;
+CREATE TRIGGER document_chunks_change_seq
+    BEFORE INSERT OR UPDATE OF chunk_text, embedding, document_type, document_id ON document_chunks
+    FOR EACH ROW EXECUTE FUNCTION set_chunk_change_seq();
+
+UPDATE document_chunks SET change_seq = nextval('document_chunks_change_seq') WHERE change_seq IS NULL;
+
+-- Partial HNSW indexes, one per chat category filter in
+-- Settings.RETRIEVAL_CATEGORY_DOCUMENT_TYPES (predicates must match it)
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_union_idx ON document_chunks
+    USING hnsw (embedding vector_cosine_ops) WHERE document_type IN ('CBA', 'Law');
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_contract_idx ON document_chunks
+    USING hnsw (embedding vector_cosine_ops) WHERE document_type IN ('Contract', 'Law');
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_news_idx ON document_chunks
+    USING hnsw (embedding vector_cosine_ops) WHERE document_type IN ('News');
+
+-- Full-text search over chunks for hybrid (lexical + vector) retrieval
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', chunk_text)) STORED;
+CREATE INDEX IF NOT EXISTS document_chunks_search_idx ON document_chunks USING gin (search_vector);
+
+-- Corpus change marker: bumped by a trigger in the same transaction as any
+-- write to documents or document_chunks, so it becomes visible exactly when
+-- the write commits, whoever the writer is. In-process caches compare the
+-- corpus version, SUM(version) over all rows, to know when to drop stale
+-- entries. The counter is spread over 16 rows picked by backend pid, so
+-- concurrent ingestion transactions rarely wait on each other's row lock.
+CREATE TABLE IF NOT EXISTS corpus_state (
+    id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+ALTER TABLE corpus_state DROP CONSTRAINT IF EXISTS corpus_state_id_check;
+
+INSERT INTO corpus_state (id, version) SELECT id, 0 FROM generate_series(0, 15) AS id ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_corpus_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE corpus_state SET version = version + 1, updated_at = NOW() WHERE id = pg_backend_pid() % 16;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS documents_corpus_version ON documents;
+CREATE TRIGGER documents_corpus_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON documents
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_corpus_version();
+
+DROP TRIGGER IF EXISTS document_chunks_corpus_version ON document_chunks;
+CREATE TRIGGER document_chunks_corpus_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON document_chunks
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_corpus_version();
+
+-- Rolling conversation memory: turns older than the verbatim window are
+-- folded into summary; summarized_until is the created_at of the last
+-- message it covers
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS metadata JSONB DEFAULT '{}'::jsonb;
+CREATE INDEX IF NOT EXISTS messages_session_created_idx ON messages (session_id, created_at);
+ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS summary TEXT;
+ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS summarized_until TIMESTAMP;
+
+-- Web search decisions, for measuring the local classifier against the
+-- reference model (reference_* is only set for shadow-sampled requests)
+CREATE TABLE IF NOT EXISTS search_decisions (
+    id UUID PRIMARY KEY,
+    created_at TIMESTAMP DEFAULT NOW(),
+    query TEXT NOT NULL,
+    tier VARCHAR(20) NOT NULL,
+    score REAL,
+    features JSONB,
+    search BOOLEAN NOT NULL,
+    search_query TEXT,
+    reference_search BOOLEAN,
+    reference_query TEXT
+);
+CREATE INDEX IF NOT EXISTS search_decisions_created_idx ON search_decisions (created_at);
+
+-- Contract analysis results, by analysis version (prompts, model) and
+-- normalized-text fingerprint. Exact matches only; the contract text is not
+-- kept
+CREATE TABLE IF NOT EXISTS contract_analysis_cache (
+    analysis_version TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    analysis JSONB NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    last_hit_at TIMESTAMP,
+    PRIMARY KEY (analysis_version, fingerprint)
+);
+-- Near-duplicate matching (MinHash bands, stored contract text) was removed
+DROP INDEX IF EXISTS contract_analysis_cache_bands_idx;
+ALTER TABLE contract_analysis_cache DROP COLUMN IF EXISTS minhash;
+ALTER TABLE contract_analysis_cache DROP COLUMN IF EXISTS bands;
+ALTER TABLE contract_analysis_cache DROP COLUMN IF EXISTS contract_text;
+CREATE INDEX IF NOT EXISTS contract_analysis_cache_created_idx ON contract_analysis_cache (created_at);
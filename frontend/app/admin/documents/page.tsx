@@ -18,6 +18,7 @@ export default function DocumentsPage() {
     const [uploadFile, setUploadFile] = useState<File | null>(null);
     const [uploadTitle, setUploadTitle] = useState('');
     const [uploadType, setUploadType] = useState('Policy');
+    const [uploadKey, setUploadKey] = useState('');
     const [isUploading, setIsUploading] = useState(false);
     const [uploadError, setUploadError] = useState<string | null>(null);
     const fileInputRef = useRef<HTMLInputElement>(null);
@@ -91,6 +92,7 @@ export default function DocumentsPage() {
             formData.append('file', uploadFile);
             formData.append('title', uploadTitle);
             formData.append('document_type', uploadType);
+            if (uploadKey.trim()) formData.append('document_key', uploadKey.trim());
 
             const res = await fetch('http://localhost:8000/api/documents/upload', {
                 method: 'POST',
@@ -108,6 +110,7 @@ export default function DocumentsPage() {
             setUploadFile(null);
             setUploadTitle('');
             setUploadType('Policy');
+            setUploadKey('');
             fetchDocuments();
         } catch (e: any) {
             setUploadError(e.message || 'Upload failed');
@@ -304,11 +307,29 @@ export default function DocumentsPage() {
                                     <option value="Policy">Policy Document</option>
                                     <option value="Law">Law / Statute</option>
                                     <option value="Contract">Contract Template</option>
+                                    <option value="CBA">Union CBA / Constitution</option>
                                     <option value="Guide">Guide / Manual</option>
                                     <option value="News">News Article</option>
                                 </select>
                             </div>
 
+                            {/* Document Key */}
+                            <div>
+                                <label className="block text-sm font-medium text-[var(--gray-700)] mb-1">
+                                    Document Key <span className="text-[var(--gray-400)] font-normal">(optional)</span>
+                                </label>
+                                <input
+                                    type="text"
+                                    value={uploadKey}
+                                    onChange={(e) => setUploadKey(e.target.value)}
+                                    placeholder="e.g. employment-act-2007"
+                                    className="w-full px-3 py-2 border border-[var(--gray-300)] rounded-lg focus:ring-2 focus:ring-[var(--primary-blue)] focus:border-transparent outline-none"
+                                />
+                                <p className="mt-1 text-xs text-[var(--gray-500)]">
+                                    Re-uploading with the same key updates that document, re-indexing only changed sections.
+                                </p>
+                            </div>
+
                             {/* Error Message */}
                             {uploadError && (
                                 <div className="p-3 bg-red-50 border border-red-200 rounded-lg text-red-700 text-sm">
@@ -1,9 +1,11 @@
 "use client";
 
 import { useState, useEffect } from 'react';
-import { RefreshCw, CheckCircle, Clock } from 'lucide-react';
+import { RefreshCw, CheckCircle, Clock, AlertCircle, Loader2 } from 'lucide-react';
 import { useAuth } from '@/hooks/useAuth';
 
+const ACTIVE_STATUSES = ["queued", "running"];
+
 export default function JobsPage() {
     const { token } = useAuth();
     const [jobs, setJobs] = useState<any[]>([]);
@@ -13,11 +15,18 @@ export default function JobsPage() {
         if (token) fetchJobs();
     }, [token]);
 
+    // Poll while anything is still in the queue or running
+    const hasActiveJobs = jobs.some((job) => ACTIVE_STATUSES.includes(job.status));
+    useEffect(() => {
+        if (!token || !hasActiveJobs) return;
+        const interval = setInterval(fetchJobs, 3000);
+        return () => clearInterval(interval);
+    }, [token, hasActiveJobs]);
+
     const fetchJobs = async () => {
         setIsLoading(true);
         try {
-            // Re-using documents endpoint as a proxy for "Ingestion Jobs"
-            const res = await fetch("http://localhost:8000/api/admin/documents/?limit=10", {
+            const res = await fetch("http://localhost:8000/api/admin/jobs/?limit=20", {
                 headers: { "Authorization": `Bearer ${token}` }
             });
             if (res.ok) {
@@ -35,7 +44,7 @@ export default function JobsPage() {
         <div className="space-y-6">
             <div className="flex justify-between items-center">
                  <h2 className="text-lg font-semibold text-[var(--gray-900)]">System Activity Log</h2>
-                 <button 
+                 <button
                     onClick={fetchJobs}
                     className="flex items-center gap-2 px-3 py-1.5 text-sm text-[var(--gray-600)] hover:text-[var(--primary-blue)] transition-colors"
                  >
@@ -45,32 +54,52 @@ export default function JobsPage() {
             </div>
 
             {/* System Status Indicator */}
-            <div className="bg-green-50 border border-green-200 rounded-xl p-4 flex items-center gap-3">
-                <div className="relative">
-                    <div className="w-3 h-3 bg-green-500 rounded-full animate-pulse" />
+            {hasActiveJobs ? (
+                <div className="bg-blue-50 border border-blue-200 rounded-xl p-4 flex items-center gap-3">
+                    <div className="relative">
+                        <div className="w-3 h-3 bg-blue-500 rounded-full animate-pulse" />
+                    </div>
+                    <div>
+                        <h3 className="text-sm font-semibold text-blue-800">Processing</h3>
+                        <p className="text-xs text-blue-600">Ingestion workers are processing queued jobs.</p>
+                    </div>
                 </div>
-                <div>
-                    <h3 className="text-sm font-semibold text-green-800">System Idle</h3>
-                    <p className="text-xs text-green-600">All queues processed. Ready for new documents.</p>
+            ) : (
+                <div className="bg-green-50 border border-green-200 rounded-xl p-4 flex items-center gap-3">
+                    <div className="relative">
+                        <div className="w-3 h-3 bg-green-500 rounded-full animate-pulse" />
+                    </div>
+                    <div>
+                        <h3 className="text-sm font-semibold text-green-800">System Idle</h3>
+                        <p className="text-xs text-green-600">All queues processed. Ready for new documents.</p>
+                    </div>
                 </div>
-            </div>
+            )}
 
-             {/* Recent Jobs (Documents) */}
+             {/* Recent Jobs */}
              <div className="space-y-4 pt-2">
-                <h3 className="text-sm font-medium text-[var(--gray-500)] uppercase tracking-wider">Recently Completed Tasks</h3>
-                
+                <h3 className="text-sm font-medium text-[var(--gray-500)] uppercase tracking-wider">Recent Ingestion Jobs</h3>
+
                 {jobs.map((job) => (
                     <div key={job.id} className="bg-white p-4 rounded-xl border border-[var(--gray-200)] flex items-center gap-4">
-                        <div className="p-2 bg-green-50 text-green-600 rounded-lg">
-                            <CheckCircle size={20} />
-                        </div>
+                        <JobIcon status={job.status} />
                         <div className="flex-1">
-                            <h4 className="font-medium text-[var(--gray-900)]">Ingest: {job.title}</h4>
+                            <h4 className="font-medium text-[var(--gray-900)]">
+                                {job.job_type === "news" ? "News scrape" : "Ingest"}: {job.title}
+                            </h4>
                             <p className="text-sm text-[var(--gray-500)]">
-                                Completed on {new Date(job.created_at).toLocaleString()} • {job.chunk_count} chunks indexed
+                                {describeJob(job)}
                             </p>
+                            {ACTIVE_STATUSES.includes(job.status) && (
+                                <div className="mt-2 h-1.5 bg-[var(--gray-100)] rounded-full overflow-hidden">
+                                    <div
+                                        className="h-full bg-blue-500 transition-all"
+                                        style={{ width: `${job.progress_percent}%` }}
+                                    />
+                                </div>
+                            )}
                         </div>
-                        <span className="text-xs font-medium text-green-600 bg-green-50 px-2 py-1 rounded-full">Success</span>
+                        <JobBadge status={job.status} />
                     </div>
                 ))}
 
@@ -81,3 +110,62 @@ export default function JobsPage() {
         </div>
     );
 }
+
+function describeJob(job: any) {
+    if (job.status === "succeeded") {
+        const chunks = job.progress?.chunks;
+        const indexed = job.result?.indexed;
+        const detail = job.job_type === "news"
+            ? `${indexed ?? 0} articles indexed`
+            : `${chunks ?? 0} chunks indexed`;
+        return `Completed on ${new Date(job.updated_at).toLocaleString()} • ${detail}`;
+    }
+    if (job.status === "failed") {
+        return `Failed after ${job.attempts} attempts: ${job.error}`;
+    }
+    if (job.status === "running") {
+        if (job.stage === "parsing") {
+            const pages = job.progress?.page_count
+                ? `page ${job.progress.pages} of ${job.progress.page_count}`
+                : `${job.progress?.pages ?? 0} blocks`;
+            return `Parsing: ${pages} • ${job.progress?.chunks ?? 0} chunks • attempt ${job.attempts}`;
+        }
+        return `Stage: ${job.stage || "starting"} • attempt ${job.attempts}`;
+    }
+    return job.error
+        ? `Retrying after error: ${job.error}`
+        : `Queued on ${new Date(job.created_at).toLocaleString()}`;
+}
+
+function JobIcon({ status }: { status: string }) {
+    if (status === "succeeded") {
+        return <div className="p-2 bg-green-50 text-green-600 rounded-lg"><CheckCircle size={20} /></div>;
+    }
+    if (status === "failed") {
+        return <div className="p-2 bg-red-50 text-red-600 rounded-lg"><AlertCircle size={20} /></div>;
+    }
+    if (status === "running") {
+        return <div className="p-2 bg-blue-50 text-blue-600 rounded-lg"><Loader2 size={20} className="animate-spin" /></div>;
+    }
+    return <div className="p-2 bg-gray-50 text-gray-500 rounded-lg"><Clock size={20} /></div>;
+}
+
+function JobBadge({ status }: { status: string }) {
+    const styles: Record<string, string> = {
+        succeeded: "text-green-600 bg-green-50",
+        failed: "text-red-600 bg-red-50",
+        running: "text-blue-600 bg-blue-50",
+        queued: "text-gray-600 bg-gray-50",
+    };
+    const labels: Record<string, string> = {
+        succeeded: "Success",
+        failed: "Failed",
+        running: "Running",
+        queued: "Queued",
+    };
+    return (
+        <span className={`text-xs font-medium px-2 py-1 rounded-full ${styles[status] || styles.queued}`}>
+            {labels[status] || status}
+        </span>
+    );
+}
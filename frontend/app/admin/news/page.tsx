@@ -45,8 +45,11 @@ export default function NewsPage() {
             if (!res.ok) throw new Error("Scrape failed");
             
             const data = await res.json();
+            const job = await waitForJob(data.job_id);
+            if (job.status !== "succeeded") throw new Error(job.error || "Scrape failed");
+
             setStatus("success");
-            setScrapedCount(data.indexed);
+            setScrapedCount(job.result?.indexed ?? 0);
             fetchArticles(); // Refresh list
         } catch (error) {
             console.error(error);
@@ -56,6 +59,19 @@ export default function NewsPage() {
         }
     };
 
+    // Scrapes run on the ingestion worker; poll the job until it settles
+    const waitForJob = async (jobId: string) => {
+        while (true) {
+            const res = await fetch(`http://localhost:8000/api/admin/jobs/${jobId}`, {
+                headers: { "Authorization": `Bearer ${token}` }
+            });
+            if (!res.ok) throw new Error("Job lookup failed");
+            const job = await res.json();
+            if (job.status === "succeeded" || job.status === "failed") return job;
+            await new Promise((resolve) => setTimeout(resolve, 2000));
+        }
+    };
+
     const handleDelete = async (id: string) => {
         if (!confirm("Remove this article from index?")) return;
         try {
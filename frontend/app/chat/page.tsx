@@ -165,34 +165,67 @@ function ChatContent() {
           formData.append('session_id', currentSessionId);
       }
 
+      const botId = (Date.now() + 1).toString();
+      const updateAnalysis = (changes: any) => {
+          setMessages((prev) => prev.map((m) => m.id === botId ? { ...m, analysis: { ...m.analysis, ...changes } } : m));
+      };
+
       try {
-          const res = await fetch("http://localhost:8000/api/chat/analyze", {
+          // Queue the analysis, then follow its events: sections render as they finish
+          const res = await fetch("http://localhost:8000/api/chat/analyze/jobs", {
               method: "POST",
               body: formData,
           });
 
           if (!res.ok) throw new Error("Analysis failed");
 
-          const analysisResult = await res.json();
-          
+          const { job_id } = await res.json();
+
           const botMsg: Message = {
-              id: (Date.now() + 1).toString(),
+              id: botId,
               role: "assistant",
-              content: "I've analyzed your document. Here is the risk assessment:",
+              content: "I'm analyzing your document. Results will appear below as each part is reviewed:",
               timestamp: new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }),
-              analysis: analysisResult
+              analysis: { pending: true }
           };
           setMessages((prev) => [...prev, botMsg]);
 
+          await new Promise<void>((resolve, reject) => {
+              const events = new EventSource(`http://localhost:8000/api/chat/analyze/jobs/${job_id}/events`);
+
+              events.addEventListener("status", (e) => {
+                  const status = JSON.parse((e as MessageEvent).data);
+                  updateAnalysis({ segments: status.segments });
+              });
+              events.addEventListener("analysis", (e) => {
+                  const { analysis } = JSON.parse((e as MessageEvent).data);
+                  updateAnalysis(analysis);
+              });
+              events.addEventListener("done", (e) => {
+                  const { analysis } = JSON.parse((e as MessageEvent).data);
+                  events.close();
+                  setMessages((prev) => prev.map((m) => m.id === botId
+                      ? { ...m, content: "I've analyzed your document. Here is the risk assessment:", analysis }
+                      : m));
+                  resolve();
+              });
+              // Both the server's error event and a dropped connection land here
+              events.addEventListener("error", (e) => {
+                  events.close();
+                  const data = (e as MessageEvent).data;
+                  reject(new Error(data ? JSON.parse(data).detail : "Lost connection to the analysis"));
+              });
+          });
+
       } catch (error) {
           console.error(error);
           const errorMsg: Message = {
-              id: (Date.now() + 1).toString(),
+              id: (Date.now() + 2).toString(),
               role: "assistant",
               content: "Sorry, I encountered an error processing your document.",
               timestamp: new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
           };
-          setMessages((prev) => [...prev, errorMsg]);
+          setMessages((prev) => [...prev.filter((m) => m.id !== botId), errorMsg]);
       } finally {
           setIsLoading(false);
           if (fileInputRef.current) fileInputRef.current.value = "";
@@ -1,21 +1,30 @@
 "use client";
 
-import { CheckCircle, AlertTriangle, XCircle, FileText, ChevronDown, ChevronUp } from 'lucide-react';
+import { CheckCircle, AlertTriangle, XCircle, FileText, ChevronDown, ChevronUp, Loader2 } from 'lucide-react';
 import { useState } from 'react';
 import { cn } from '@/lib/utils';
 import { motion, AnimatePresence } from 'framer-motion';
 
+// While an analysis job runs (pending), sections arrive one at a time:
+// concerns and compliant terms as parts of the contract are reviewed,
+// score, summary and missing clauses at the end.
 type AnalysisResult = {
-    overall_score: number;
-    assessment_summary: string;
-    compliant_terms: { term: string; details: string }[];
-    areas_of_concern: { clause: string; risk_level: string; explanation: string; recommendation: string }[];
-    missing_clauses: string[];
+    overall_score?: number;
+    assessment_summary?: string;
+    compliant_terms?: { term: string; details: string }[];
+    areas_of_concern?: { clause: string; risk_level: string; explanation: string; recommendation: string }[];
+    missing_clauses?: string[];
+    pending?: boolean;
+    segments?: { done: number; total: number; failed: string[] } | null;
 };
 
 export default function ContractAnalysisView({ result }: { result: AnalysisResult }) {
-    const scoreColor = result.overall_score >= 80 ? 'text-green-600' : result.overall_score >= 50 ? 'text-yellow-600' : 'text-red-600';
-    const scoreBg = result.overall_score >= 80 ? 'bg-green-100' : result.overall_score >= 50 ? 'bg-yellow-100' : 'bg-red-100';
+    const score = result.overall_score;
+    const scoreColor = score === undefined ? 'text-[var(--gray-400)]' : score >= 80 ? 'text-green-600' : score >= 50 ? 'text-yellow-600' : 'text-red-600';
+    const concerns = result.areas_of_concern ?? [];
+    const compliantTerms = result.compliant_terms ?? [];
+    const missingClauses = result.missing_clauses ?? [];
+    const progress = result.segments ? ` (${result.segments.done} of ${result.segments.total} parts reviewed)` : '';
 
     return (
         <div className="bg-white rounded-xl border border-[var(--gray-200)] overflow-hidden shadow-sm mt-2 w-full max-w-2xl">
@@ -26,19 +35,26 @@ export default function ContractAnalysisView({ result }: { result: AnalysisResul
                         <FileText size={20} className="text-[var(--primary-blue)]" />
                         Contract Analysis
                     </h3>
-                    <p className="text-sm text-[var(--gray-500)] mt-1">AI-powered risk assessment</p>
+                    <p className="text-sm text-[var(--gray-500)] mt-1 flex items-center gap-1.5">
+                        {result.pending && <Loader2 size={14} className="animate-spin" />}
+                        {result.pending ? `Analyzing${progress}...` : 'AI-powered risk assessment'}
+                    </p>
                 </div>
                 <div className="text-center">
-                    <div className={cn("text-3xl font-bold", scoreColor)}>{result.overall_score}</div>
+                    <div className={cn("text-3xl font-bold", scoreColor)}>{score ?? '--'}</div>
                     <div className="text-[10px] uppercase font-bold text-[var(--gray-400)] tracking-wider">Score</div>
                 </div>
             </div>
 
             {/* Summary */}
             <div className="p-6">
-                <p className="text-[var(--gray-700)] leading-relaxed italic border-l-4 border-[var(--primary-blue)] pl-4 py-1 bg-blue-50/50 rounded-r">
-                    "{result.assessment_summary}"
-                </p>
+                {result.assessment_summary ? (
+                    <p className="text-[var(--gray-700)] leading-relaxed italic border-l-4 border-[var(--primary-blue)] pl-4 py-1 bg-blue-50/50 rounded-r">
+                        "{result.assessment_summary}"
+                    </p>
+                ) : (
+                    <div className="h-12 rounded bg-[var(--gray-100)] animate-pulse" />
+                )}
             </div>
 
             {/* Risk Areas */}
@@ -47,9 +63,12 @@ export default function ContractAnalysisView({ result }: { result: AnalysisResul
                     <AlertTriangle size={16} className="text-[var(--error-red)]" />
                     Areas of Concern
                 </h4>
-                {result.areas_of_concern.map((item, idx) => (
+                {concerns.map((item, idx) => (
                     <RiskItem key={idx} item={item} />
                 ))}
+                {result.pending && concerns.length === 0 && (
+                    <p className="text-sm text-[var(--gray-500)] italic">Reviewing clauses...</p>
+                )}
             </div>
 
             {/* Compliant Terms */}
@@ -59,7 +78,7 @@ export default function ContractAnalysisView({ result }: { result: AnalysisResul
                     Compliant Terms
                 </h4>
                 <div className="grid grid-cols-1 sm:grid-cols-2 gap-3">
-                    {result.compliant_terms.map((item, idx) => (
+                    {compliantTerms.map((item, idx) => (
                         <div key={idx} className="bg-green-50 border border-green-100 rounded-lg p-3">
                             <p className="font-medium text-green-800 text-sm">{item.term}</p>
                             <p className="text-xs text-green-600 mt-1">{item.details}</p>
@@ -69,14 +88,14 @@ export default function ContractAnalysisView({ result }: { result: AnalysisResul
             </div>
             
              {/* Missing Clauses */}
-             {result.missing_clauses.length > 0 && (
+             {missingClauses.length > 0 && (
                 <div className="px-6 pb-6">
                     <h4 className="text-sm font-semibold text-[var(--gray-900)] uppercase tracking-wider flex items-center gap-2 mb-3">
                         <XCircle size={16} className="text-[var(--gray-500)]" />
                         Missing Standard Clauses
                     </h4>
                     <div className="flex flex-wrap gap-2">
-                         {result.missing_clauses.map((clause, idx) => (
+                         {missingClauses.map((clause, idx) => (
                              <span key={idx} className="px-3 py-1 bg-[var(--gray-100)] text-[var(--gray-600)] rounded-full text-xs font-medium border border-[var(--gray-200)]">
                                  {clause}
                              </span>
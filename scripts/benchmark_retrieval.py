@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../backend'))
+
+from app.models.database import db
+from app.services.rag_service import rag_service, RETRIEVAL_MODES
+
+# Eval file format (JSON list):
+# [{"query": "Section 40 Employment Act redundancy", "relevant": ["Employment Act", "redundancy"]}]
+# A relevant string counts as found when it appears (case-insensitive) in the
+# title or text of any of the top-k chunks.
+
+def recall_at_k(chunks: list, relevant: list) -> float:
+    haystacks = [f"{c['title']}\n{c['chunk_text']}".lower() for c in chunks]
+    found = sum(1 for r in relevant if any(r.lower() in h for h in haystacks))
+    return found / len(relevant) if relevant else 0.0
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare retrieval modes on recall@k and latency.")
+    parser.add_argument("eval_file")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per query and mode")
+    parser.add_argument("--modes", nargs="+", default=list(RETRIEVAL_MODES))
+    args = parser.parse_args()
+
+    with open(args.eval_file) as f:
+        cases = json.load(f)
+
+    try:
+        await db.connect()
+
+        # Embed once per query so only retrieval itself is timed
+        embeddings = [await rag_service.embed_query(case["query"]) for case in cases]
+
+        print(f"{len(cases)} queries, top_k={args.top_k}\n")
+        print(f"{'mode':<10} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+
+        for mode in args.modes:
+            recalls = []
+            latencies = []
+            for case, embedding in zip(cases, embeddings):
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    chunks = await rag_service.retrieve_relevant_chunks(
+                        case["query"], category=case.get("category"), top_k=args.top_k,
+                        query_embedding=embedding, mode=mode
+                    )
+                    latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(recall_at_k(chunks, case["relevant"]))
+
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            print(f"{mode:<10} {statistics.mean(recalls):>9.3f} {statistics.median(latencies):>8.1f} {p95:>8.1f}")
+
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../backend'))
+
+from app.models.database import db
+from app.services.rag_service import rag_service, RETRIEVAL_MODES
+from app.services.reranker import RERANKERS
+from app.utils.prompt_templates import LABOR_RIGHTS_SYSTEM_PROMPT
+from app.utils.tokens import count_tokens
+from benchmark_retrieval import recall_at_k
+
+# Offline comparison of rerankers on the same eval file as
+# benchmark_retrieval.py. For each reranker it reports recall over the
+# chunks that would reach the prompt, how many chunks that is, the prompt
+# size in tokens and retrieval + reranking latency.
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare rerankers on recall, prompt size and latency.")
+    parser.add_argument("eval_file")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--mode", choices=RETRIEVAL_MODES, default="vector")
+    parser.add_argument("--rerankers", nargs="+", default=["none"] + list(RERANKERS))
+    args = parser.parse_args()
+
+    with open(args.eval_file) as f:
+        cases = json.load(f)
+
+    try:
+        await db.connect()
+
+        # Embed once per query so only retrieval and reranking are timed
+        embeddings = [await rag_service.embed_query(case["query"]) for case in cases]
+
+        print(f"{len(cases)} queries, top_k={args.top_k}, mode={args.mode}\n")
+        print(f"{'reranker':<14} {'recall':>7} {'chunks':>7} {'context tok':>12} {'prompt tok':>11} {'p50 ms':>8}")
+
+        for name in args.rerankers:
+            recalls, chunk_counts, context_tokens, prompt_tokens, latencies = [], [], [], [], []
+            try:
+                for case, embedding in zip(cases, embeddings):
+                    start = time.perf_counter()
+                    chunks = await rag_service.retrieve_relevant_chunks(
+                        case["query"], category=case.get("category"), top_k=args.top_k,
+                        query_embedding=embedding, mode=args.mode, reranker=name
+                    )
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+                    context = "\n\n".join(c["chunk_text"] for c in chunks)
+                    recalls.append(recall_at_k(chunks, case["relevant"]))
+                    chunk_counts.append(len(chunks))
+                    context_tokens.append(count_tokens(context))
+                    prompt_tokens.append(count_tokens(LABOR_RIGHTS_SYSTEM_PROMPT.format(context=context, question=case["query"])))
+            except Exception as e:
+                print(f"{name:<14} failed: {e}")
+                continue
+
+            print(
+                f"{name:<14} {statistics.mean(recalls):>7.3f} {statistics.mean(chunk_counts):>7.1f} "
+                f"{statistics.mean(context_tokens):>12.0f} {statistics.mean(prompt_tokens):>11.0f} "
+                f"{statistics.median(latencies):>8.1f}"
+            )
+
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
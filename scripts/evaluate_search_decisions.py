@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../backend'))
+
+from app.models.database import db
+
+# Reports how the tiered search decider behaves in production, from the
+# search_decisions log: how often each tier decided, and for shadow-sampled
+# requests (SEARCH_DECISION_SHADOW_RATE > 0) how often it agreed with the
+# reference model.
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare logged search decisions with the reference model.")
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    try:
+        await db.connect()
+
+        tiers = await db.fetch("""
+            SELECT tier, COUNT(*) AS n, AVG(search::int) AS search_rate
+            FROM search_decisions
+            WHERE created_at > NOW() - make_interval(days => $1)
+            GROUP BY tier ORDER BY n DESC
+        """, args.days)
+        total = sum(r["n"] for r in tiers)
+        print(f"{total} decisions in the last {args.days} days\n")
+        print(f"{'tier':<18} {'share':>7} {'search %':>9}")
+        for r in tiers:
+            print(f"{r['tier']:<18} {r['n'] / total:>7.1%} {float(r['search_rate']):>9.1%}")
+
+        rows = await db.fetch("""
+            SELECT tier, search, reference_search, COUNT(*) AS n
+            FROM search_decisions
+            WHERE created_at > NOW() - make_interval(days => $1) AND reference_search IS NOT NULL
+            GROUP BY tier, search, reference_search
+        """, args.days)
+        if not rows:
+            print("\nNo shadow-sampled decisions; set SEARCH_DECISION_SHADOW_RATE to collect some.")
+            return
+
+        print(f"\n{'tier':<18} {'agree':>7} {'both':>6} {'neither':>8} {'missed':>7} {'extra':>6}")
+        for tier in sorted({r["tier"] for r in rows}) + ["all"]:
+            counts = {(True, True): 0, (False, False): 0, (False, True): 0, (True, False): 0}
+            for r in rows:
+                if tier in ("all", r["tier"]):
+                    counts[(r["search"], r["reference_search"])] += r["n"]
+            n = sum(counts.values())
+            agree = (counts[(True, True)] + counts[(False, False)]) / n
+            # missed: reference searched, we didn't; extra: we searched, reference didn't
+            print(
+                f"{tier:<18} {agree:>7.1%} {counts[(True, True)]:>6} {counts[(False, False)]:>8} "
+                f"{counts[(False, True)]:>7} {counts[(True, False)]:>6}"
+            )
+
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
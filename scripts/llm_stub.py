@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Minimal OpenAI-compatible server for load tests: chat completions (plain,
+# streamed and JSON mode) and embeddings, with configurable latency and no
+# cost. Point the backend at it with LLM_BASE_URL=http://localhost:8100/v1.
+# Embeddings are deterministic per text, so caches behave as in production.
+# It also stands in for the web search APIs: TAVILY_BASE_URL=
+# http://localhost:8100/tavily and SERPER_BASE_URL=http://localhost:8100/serper
+# (any API key).
+
+app = FastAPI()
+config = {"latency": 0.5, "jitter": 0.2, "token_delay": 0.01, "dimensions": 1536}
+
+STUB_ANSWER = "This is a stub answer. Under the Employment Act an employee is entitled to the rights described in the retrieved documents."
+STUB_CONTRACT = {
+    "overall_score": 70,
+    "assessment_summary": "Stub analysis.",
+    "compliant_terms": [],
+    "areas_of_concern": [],
+    "missing_clauses": []
+}
+
+async def _wait(seconds: float):
+    await asyncio.sleep(max(seconds + random.uniform(-config["jitter"], config["jitter"]), 0))
+
+def _embedding(text: str) -> list:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+    vector = np.random.default_rng(seed).standard_normal(config["dimensions"]).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    await _wait(config["latency"] / 5)
+    return {
+        "object": "list",
+        "model": body["model"],
+        "data": [{"object": "embedding", "index": i, "embedding": _embedding(text)} for i, text in enumerate(inputs)],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0}
+    }
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+    content = json.dumps(STUB_CONTRACT) if json_mode else STUB_ANSWER
+    completion_id = f"chatcmpl-stub-{time.time_ns()}"
+    await _wait(config["latency"])
+
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    async def events():
+        for word in content.split(" "):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config["token_delay"])
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+def _search_results(query: str, count: int) -> list:
+    slug = "-".join(query.lower().split())[:60]
+    return [
+        {"title": f"Stub result {i + 1} for {query}", "url": f"https://news.example.ke/{slug}/{i + 1}",
+         "text": f"Stub article {i + 1} about {query}. Workers and unions in Kenya reacted to the latest developments."}
+        for i in range(count)
+    ]
+
+@app.post("/tavily/search")
+async def tavily_search(request: Request):
+    body = await request.json()
+    await _wait(config["latency"])
+    results = _search_results(body["query"], body.get("max_results", 5))
+    return {"query": body["query"], "results": [{"title": r["title"], "url": r["url"], "content": r["text"], "score": 0.9} for r in results]}
+
+@app.post("/serper/search")
+async def serper_search(request: Request):
+    body = await request.json()
+    await _wait(config["latency"])
+    results = _search_results(body["q"], body.get("num", 10))
+    return {"organic": [{"title": r["title"], "link": r["url"], "snippet": r["text"], "position": i + 1} for i, r in enumerate(results)]}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub for load tests.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=config["latency"], help="seconds before a completion starts")
+    parser.add_argument("--jitter", type=float, default=config["jitter"])
+    parser.add_argument("--token-delay", type=float, default=config["token_delay"], help="seconds between streamed tokens")
+    args = parser.parse_args()
+    config.update(latency=args.latency, jitter=args.jitter, token_delay=args.token_delay)
+
+    uvicorn.run(app, host="0.0.0.0", port=args.port)